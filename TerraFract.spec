@@ -20,7 +20,6 @@ datas += collect_data_files("matplotlib", includes=["mpl-data/*"])
 # 2) Any hidden‐imported bits
 hiddenimports  = collect_submodules("PySide6")
 hiddenimports += collect_submodules("numba")
-hiddenimports += ["noise._perlin","noise._simplex","noise._openSimplex2"]
 
 # 3) Native DLLs for numpy/scipy/numba
 binaries  = collect_dynamic_libs("numpy")
@@ -12,22 +12,28 @@ New in this version
 """
 from __future__ import annotations
 
-import io
+import hashlib
+import json
 import os
 import sys
+import threading
 import webbrowser
-import random
+from collections import OrderedDict
 
 import numpy as np
-from PySide6.QtCore import Qt, QThread, Signal
-from PySide6.QtGui import QPixmap
+from PySide6.QtCore import Qt, QObject, QRunnable, QThread, QThreadPool, QTimer, Signal
+from PySide6.QtGui import QImage, QPixmap
 from PySide6.QtWidgets import (
     QApplication, QWidget, QHBoxLayout, QVBoxLayout, QFormLayout,
     QPushButton, QLabel, QComboBox, QSpinBox, QFileDialog,
     QSizePolicy, QDialog, QProgressBar, QMessageBox,
 )
 
+# pins Numba's threading layer before the warm-up thread runs a kernel
+import terrafract._parallel  # noqa: F401
 from terrafract.heightmap_generators import generate_heightmap
+from terrafract.palette import colorize, save_palette_png
+from terrafract.post_processing import thermal_erosion, hydraulic_erosion
 from terrafract.fractal_workbench import FractalWorkbench
 from terrafract.stretch_goals import create_erosion_timelapse
 
@@ -53,48 +59,266 @@ DESCRIPTIONS = {
     "Help":      "Docs & source code",
 }
 
-# ───────────────────────── helper: MPL ➜ QPixmap ───────────────────
-def _matplotlib_to_pixmap(fig) -> QPixmap:
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png", bbox_inches="tight")
-    buf.seek(0)
-    pix = QPixmap()
-    pix.loadFromData(buf.getvalue())
+# ───────────────────────── helper: NumPy ➜ QPixmap ─────────────────
+THUMB_PX = 200          # edge length of the preview label
+PREVIEW_SIZE = 64       # heightmap edge used for previews
+REFRESH_DELAY_MS = 150  # debounce for spinbox scrubbing
+SMOOTH_DELAY_MS = 500   # idle time before the preview is re-scaled smoothly
+
+def _heightmap_to_pixmap(Z: np.ndarray) -> QPixmap:
+    """Colour-map ``Z`` through the terrain LUT straight into a QPixmap."""
+    rgb = colorize(Z)
+    h, w = Z.shape
+    img = QImage(rgb.data, w, h, 3 * w, QImage.Format_RGB888)
+    return QPixmap.fromImage(img)
+
+# ───────────────────── thumbnail cache (shared) ─────────────────────
+THUMB_CACHE_SIZE = 64
+_thumb_cache: OrderedDict[tuple, QPixmap] = OrderedDict()
+
+def _cached_thumb(key: tuple) -> QPixmap | None:
+    """Return the cached (unscaled) preview for ``key``, marking it recently used."""
+    pix = _thumb_cache.get(key)
+    if pix is not None:
+        _thumb_cache.move_to_end(key)
     return pix
 
+def _scale_thumb(pix: QPixmap, mode=Qt.FastTransformation) -> QPixmap:
+    """Fit ``pix`` into the preview label; a no-op if it already fits exactly."""
+    if pix.size() == pix.size().scaled(THUMB_PX, THUMB_PX, Qt.KeepAspectRatio):
+        return pix
+    return pix.scaled(THUMB_PX, THUMB_PX, Qt.KeepAspectRatio, mode)
+
+def _store_thumb(key: tuple, Z: np.ndarray) -> QPixmap:
+    """Colour-map ``Z`` into an unscaled preview pixmap and add it to the LRU cache."""
+    pix = _heightmap_to_pixmap(Z)
+    _thumb_cache[key] = pix
+    if len(_thumb_cache) > THUMB_CACHE_SIZE:
+        _thumb_cache.popitem(last=False)
+    return pix
+
+def _params_key(params: dict) -> tuple:
+    return tuple(sorted(params.items()))
+
+def _thumb_key(params: dict) -> tuple:
+    """Hashable cache key; the size is clamped first so large maps share a preview."""
+    return _params_key(dict(params, size=min(params["size"], PREVIEW_SIZE)))
+
+# ───────────────────── on-disk DEM cache ───────────────────────────
+DEM_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "terrafract"
+)
+DEM_CACHE_MAX_BYTES = 500 * 2**20
+DEM_CACHE_TRIM_BYTES = 450 * 2**20   # evict down to this, so a full cache isn't rescanned per write
+DEM_CACHE_VERSION = 4   # bump whenever generator output changes for equal params
+
+def _dem_cache_path(params: dict) -> str:
+    blob = json.dumps([DEM_CACHE_VERSION, params], sort_keys=True).encode()
+    return os.path.join(DEM_CACHE_DIR, hashlib.sha256(blob).hexdigest() + ".npy")
+
+_dem_cache_bytes: int | None = None   # running size of DEM_CACHE_DIR; None until scanned
+_dem_cache_lock = threading.Lock()      # misses are saved from worker threads
+
+def _evict_dem_cache(max_bytes: int = DEM_CACHE_MAX_BYTES) -> int:
+    """
+    Delete least-recently used maps until the cache fits in ``max_bytes``.
+    Returns the bytes left in the cache.
+    """
+    with os.scandir(DEM_CACHE_DIR) as it:
+        files = sorted(
+            (e.stat().st_mtime, e.stat().st_size, e.path)
+            for e in it if e.name.endswith(".npy")
+        )
+    total = sum(size for _, size, _ in files)
+    for _, size, path in files:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:   # still memory-mapped (Windows) or already gone
+            pass
+    return total
+
+def _account_dem_write(nbytes: int) -> None:
+    """
+    Add a saved map to the running cache size; the directory is only
+    scanned on the first write and once the total passes the cap.
+    """
+    global _dem_cache_bytes
+    with _dem_cache_lock:
+        if _dem_cache_bytes is None:
+            _dem_cache_bytes = _evict_dem_cache()
+        else:
+            _dem_cache_bytes += nbytes
+            if _dem_cache_bytes > DEM_CACHE_MAX_BYTES:
+                _dem_cache_bytes = _evict_dem_cache(DEM_CACHE_TRIM_BYTES)
+
+def _cached_heightmap(params: dict) -> np.ndarray:
+    """
+    ``generate_heightmap(**params)`` backed by ``DEM_CACHE_DIR``.
+    Hits are memory-mapped read-only; misses are generated and saved.
+    """
+    path = _dem_cache_path(params)
+    try:
+        Z = np.load(path, mmap_mode="r")
+        os.utime(path)   # mark as recently used for eviction
+        return Z
+    except (OSError, ValueError):
+        pass
+    Z = generate_heightmap(**params)
+    try:
+        os.makedirs(DEM_CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, Z)
+        os.replace(tmp, path)   # atomic, so concurrent jobs never see half a file
+        _account_dem_write(os.path.getsize(path))
+    except OSError:
+        pass   # read-only home etc. – caching is best-effort
+    return Z
+
+# ───────────────────── full-size heightmap memo ─────────────────────
+FULL_CACHE_SIZE = 4
+_full_maps: OrderedDict[tuple, np.ndarray] = OrderedDict()
+_full_lock = threading.Lock()   # maps are generated on worker threads
+
+def _full_heightmap(params: dict) -> np.ndarray:
+    """
+    Generate (or reuse) the full-size map for ``params``.
+    The result is shared, so it is returned read-only.
+    """
+    key = _params_key(params)
+    with _full_lock:
+        Z = _full_maps.get(key)
+        if Z is not None:
+            _full_maps.move_to_end(key)
+            return Z
+    Z = _cached_heightmap(params)
+    Z.flags.writeable = False
+    with _full_lock:
+        _full_maps[key] = Z
+        if len(_full_maps) > FULL_CACHE_SIZE:
+            _full_maps.popitem(last=False)
+    return Z
+
+def _downsampled_preview(params: dict) -> np.ndarray | None:
+    """Strided view of an already generated full-size map, if there is one."""
+    with _full_lock:
+        Z = _full_maps.get(_params_key(params))
+    if Z is None:
+        return None
+    step = max(1, Z.shape[0] // PREVIEW_SIZE)
+    return Z[::step, ::step]
+
+# ───────────────────── preview worker (thread pool) ─────────────────
+class _ThumbSignals(QObject):
+    done = Signal(int, object)   # job id, heightmap
+    failed = Signal(int, str)    # job id, error message
+
+class _ThumbJob(QRunnable):
+    """Generate a preview heightmap on ``QThreadPool.globalInstance()``."""
+    def __init__(self, job_id: int, key: tuple):
+        super().__init__()
+        self.job_id = job_id
+        self.key = key
+        self.signals = _ThumbSignals()
+
+    def run(self):
+        try:
+            Z = _cached_heightmap(dict(self.key))
+        except Exception as e:
+            self.signals.failed.emit(self.job_id, str(e))
+            return
+        self.signals.done.emit(self.job_id, Z)
+
+# ───────────────────── quick-map worker thread ──────────────────────
+class _QuickThread(QThread):
+    saved = Signal(str)      # output path when the PNG is written
+    failed = Signal(str)     # error message if generating or saving failed
+
+    def __init__(self, params, out_path, parent=None):
+        super().__init__(parent)
+        self.params = params
+        self.out = out_path
+
+    def run(self):
+        try:
+            save_palette_png(_full_heightmap(self.params), self.out)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.saved.emit(self.out)
+
 # ───────────────────── timelapse worker thread ──────────────────────
 class _TimelapseThread(QThread):
     progress = Signal(int)   # 0–100
-    finished = Signal(str)   # output path when done
+    saved = Signal(str)      # output path when done
+    cancelled = Signal()     # stopped early via requestInterruption()
+    failed = Signal(str)     # error message if generating or rendering failed
 
-    def __init__(self, Z, steps, interval_ms, out_path):
-        super().__init__()
-        self.Z = Z
+    def __init__(self, z_factory, steps, interval_ms, out_path, parent=None):
+        super().__init__(parent)
+        self.z_factory = z_factory   # builds the initial map off the GUI thread
         self.steps = steps
         self.interval = interval_ms
         self.out = out_path
 
     def run(self):
-        create_erosion_timelapse(
-            self.Z,
-            steps=self.steps,
-            interval=self.interval,
-            therm_iters=1,
-            hydro_iters=1,
-            output_path=self.out
-        )
-        self.progress.emit(100)
-        self.finished.emit(self.out)
+        try:
+            Z = self.z_factory()
+            if self.isInterruptionRequested():
+                self.cancelled.emit()
+                return
+            create_erosion_timelapse(
+                Z,
+                steps=self.steps,
+                interval=self.interval,
+                therm_iters=1,
+                hydro_iters=1,
+                output_path=self.out,
+                progress_cb=lambda i, n: self.progress.emit(int(100 * i / n)),
+                cancel_cb=self.isInterruptionRequested,
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        if self.isInterruptionRequested():
+            self.cancelled.emit()
+        else:
+            self.saved.emit(self.out)
 
-# ───────────────────── quick-PNG generator dialog ───────────────────
-class _QuickDlg(QDialog):
+# ───────────────────── shared preview dialog base ───────────────────
+class _PreviewDlg(QDialog):
     """
-    Pick preset / seed / size and save a single PNG (no erosion).
+    Preset / seed / size controls with a live thumbnail and an output path.
+    Subclasses set the class attributes below and may add rows via
+    :meth:`_add_extra_rows`.
     """
+    TITLE = ""
+    MIN_WIDTH = 400
+    SIZE_RANGE = (33, 1025)
+    DEFAULT_SIZE = 257
+    RANDOM_SEED = False               # start from a random seed instead of 0
+    DEFAULT_PATH = ""
+    PATH_CAPTION = ""
+    PATH_FILTER = ""
+    ACCEPT_TEXT = "OK"
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setWindowTitle("Quick Terrain")
-        self.setMinimumWidth(400)
+        self.setWindowTitle(self.TITLE)
+        self.setMinimumWidth(self.MIN_WIDTH)
+
+        self._job_id = 0
+        self._pending_key: tuple | None = None
+        # one shared timer: any burst of edits collapses into a single render
+        self._debounce = QTimer(self, singleShot=True, interval=REFRESH_DELAY_MS)
+        self._debounce.timeout.connect(self._do_refresh)
+        # interactive updates scale fast; a smooth pass follows once idle
+        self._raw_thumb: QPixmap | None = None
+        self._smooth = QTimer(self, singleShot=True, interval=SMOOTH_DELAY_MS)
+        self._smooth.timeout.connect(self._smooth_thumb)
 
         layout = QFormLayout(self)
 
@@ -105,17 +329,21 @@ class _QuickDlg(QDialog):
 
         self.seed = QSpinBox()
         self.seed.setRange(0, 9999)
+        if self.RANDOM_SEED:
+            self.seed.setValue(int(np.random.default_rng().integers(0, 10000)))
         self.seed.valueChanged.connect(self._refresh)
         layout.addRow("Seed:", self.seed)
 
         self.sz = QSpinBox()
-        self.sz.setRange(33, 1025)
-        self.sz.setValue(257)
+        self.sz.setRange(*self.SIZE_RANGE)
+        self.sz.setValue(self.DEFAULT_SIZE)
         self.sz.valueChanged.connect(self._refresh)
         layout.addRow("Size:", self.sz)
 
+        self._add_extra_rows(layout)
+
         hl = QHBoxLayout()
-        self.path_lbl = QLabel("terrain.png")
+        self.path_lbl = QLabel(self.DEFAULT_PATH)
         self.path_lbl.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         btn = QPushButton("Change…")
         btn.clicked.connect(self._pick_path)
@@ -124,40 +352,79 @@ class _QuickDlg(QDialog):
         layout.addRow("Save to:", hl)
 
         self.thumb = QLabel(alignment=Qt.AlignCenter)
-        self.thumb.setFixedSize(200, 200)
+        self.thumb.setFixedSize(THUMB_PX, THUMB_PX)
         layout.addRow(self.thumb)
 
-        ok = QPushButton("Generate")
+        ok = QPushButton(self.ACCEPT_TEXT)
         ok.clicked.connect(self.accept)
         layout.addRow(ok)
 
-        self._refresh()
+        self._do_refresh()
+
+    # ---------- hooks ----------
+    def _add_extra_rows(self, layout: QFormLayout) -> None:
+        """Add dialog-specific rows between *Size* and *Save to*."""
 
     # ---------- helpers ----------
     def _pick_path(self):
-        p, _ = QFileDialog.getSaveFileName(self, "Save PNG", "terrain.png", "PNG (*.png)")
+        p, _ = QFileDialog.getSaveFileName(
+            self, self.PATH_CAPTION, self.DEFAULT_PATH, self.PATH_FILTER
+        )
         if p:
             self.path_lbl.setText(p)
 
-    def _refresh(self):
+    def _refresh(self, *_):
+        """(Re)start the debounce; the preview updates once edits pause."""
+        self._debounce.start()
+
+    def _do_refresh(self):
         """Update thumbnail preview."""
-        p = self.params.copy()
-        p["size"] = min(p["size"], 64)  # quick low-res preview
-        fig = None
-        try:
-            Z = generate_heightmap(**p)
-            import matplotlib.pyplot as plt
-            fig, ax = plt.subplots(figsize=(2, 2), dpi=100)
-            ax.imshow(Z, cmap="terrain")
-            ax.axis("off")
-            pix = _matplotlib_to_pixmap(fig)
-            self.thumb.setPixmap(
-                pix.scaled(200, 200, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            )
-        finally:
-            if fig:
-                import matplotlib.pyplot as plt
-                plt.close(fig)
+        params = self.params
+        self._job_id += 1
+        Z = _downsampled_preview(params)
+        if Z is not None:  # map already generated at full size – just subsample it
+            self._show_thumb(_heightmap_to_pixmap(Z))
+            return
+        key = _thumb_key(params)
+        pix = _cached_thumb(key)
+        if pix is not None:
+            self._show_thumb(pix)
+            return
+        job = _ThumbJob(self._job_id, key)
+        job.signals.done.connect(self._on_thumb)
+        job.signals.failed.connect(self._on_thumb_failed)
+        self._pending_key = key
+        QThreadPool.globalInstance().start(job)
+
+    def _on_thumb(self, job_id: int, Z: np.ndarray):
+        """Show a finished preview unless a newer request superseded it."""
+        if job_id != self._job_id:
+            return
+        self._show_thumb(_store_thumb(self._pending_key, Z))
+
+    def _on_thumb_failed(self, job_id: int, message: str):
+        """Replace the stale preview with a note unless a newer request superseded it."""
+        if job_id != self._job_id:
+            return
+        self._pending_key = None
+        self._raw_thumb = None
+        self._smooth.stop()
+        self.thumb.setText("Preview failed")   # also clears the old pixmap
+        self.thumb.setToolTip(message)
+
+    def _show_thumb(self, pix: QPixmap):
+        """Display ``pix`` with a cheap nearest-neighbour scale for now."""
+        if self._raw_thumb is not None and pix.cacheKey() == self._raw_thumb.cacheKey():
+            return  # same cached pixmap already on screen (or its smooth pass pending)
+        self._raw_thumb = pix
+        self.thumb.setToolTip("")
+        self.thumb.setPixmap(_scale_thumb(pix))
+        self._smooth.start()
+
+    def _smooth_thumb(self):
+        """Idle pass: replace the fast preview with a bilinear one."""
+        if self._raw_thumb is not None:
+            self.thumb.setPixmap(_scale_thumb(self._raw_thumb, Qt.SmoothTransformation))
 
     # ---------- API ----------
     @property
@@ -170,151 +437,100 @@ class _QuickDlg(QDialog):
     def out_path(self) -> str:
         return self.path_lbl.text()
 
+# ───────────────────── quick-PNG generator dialog ───────────────────
+class _QuickDlg(_PreviewDlg):
+    """
+    Pick preset / seed / size and save a single PNG (no erosion).
+    """
+    TITLE = "Quick Terrain"
+    DEFAULT_PATH = "terrain.png"
+    PATH_CAPTION = "Save PNG"
+    PATH_FILTER = "PNG (*.png)"
+    ACCEPT_TEXT = "Generate"
+
 # ─────────────────── timelapse setup dialog (NEW) ────────────────────
-class _TimelapseDlg(QDialog):
+class _TimelapseDlg(_PreviewDlg):
     """
     Pick preset / seed / size / steps, preview the terrain,
     and choose where the MP4 timelapse will be saved.
     """
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("Timelapse Setup")
-        self.setMinimumWidth(420)
-
-        layout = QFormLayout(self)
-
-        # --- same controls as quick PNG ---
-        self.cb = QComboBox()
-        self.cb.addItems(PRESETS)
-        self.cb.currentTextChanged.connect(self._refresh)
-        layout.addRow("Preset:", self.cb)
-
-        self.seed = QSpinBox()
-        self.seed.setRange(0, 9999)
-        self.seed.setValue(random.randint(0, 9999))
-        self.seed.valueChanged.connect(self._refresh)
-        layout.addRow("Seed:", self.seed)
-
-        self.sz = QSpinBox()
-        self.sz.setRange(64, 1025)
-        self.sz.setValue(256)
-        self.sz.valueChanged.connect(self._refresh)
-        layout.addRow("Size:", self.sz)
-
-        # --- timelapse-specific ---
+    TITLE = "Timelapse Setup"
+    MIN_WIDTH = 420
+    SIZE_RANGE = (64, 1025)
+    DEFAULT_SIZE = 256
+    RANDOM_SEED = True
+    DEFAULT_PATH = "timelapse.mp4"
+    PATH_CAPTION = "Save timelapse"
+    PATH_FILTER = "MP4 (*.mp4)"
+    ACCEPT_TEXT = "Start rendering"
+
+    def _add_extra_rows(self, layout: QFormLayout) -> None:
         self.steps = QSpinBox()
         self.steps.setRange(10, 600)
         self.steps.setValue(60)
         layout.addRow("Steps:", self.steps)
 
-        hl = QHBoxLayout()
-        self.path_lbl = QLabel("timelapse.mp4")
-        self.path_lbl.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-        btn = QPushButton("Change…")
-        btn.clicked.connect(self._pick_path)
-        hl.addWidget(self.path_lbl)
-        hl.addWidget(btn)
-        layout.addRow("Save to:", hl)
-
-        self.thumb = QLabel(alignment=Qt.AlignCenter)
-        self.thumb.setFixedSize(200, 200)
-        layout.addRow(self.thumb)
-
-        ok = QPushButton("Start rendering")
-        ok.clicked.connect(self.accept)
-        layout.addRow(ok)
-
-        self._refresh()
-
-    # ---------- helpers ----------
-    def _pick_path(self):
-        p, _ = QFileDialog.getSaveFileName(
-            self, "Save timelapse", "timelapse.mp4", "MP4 (*.mp4)"
-        )
-        if p:
-            self.path_lbl.setText(p)
-
-    def _refresh(self):
-        """Update preview thumbnail."""
-        p = self.params.copy()
-        p["size"] = min(p["size"], 64)
-        fig = None
-        try:
-            Z = generate_heightmap(**p)
-            import matplotlib.pyplot as plt
-            fig, ax = plt.subplots(figsize=(2, 2), dpi=100)
-            ax.imshow(Z, cmap="terrain")
-            ax.axis("off")
-            pix = _matplotlib_to_pixmap(fig)
-            self.thumb.setPixmap(
-                pix.scaled(200, 200, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            )
-        finally:
-            if fig:
-                import matplotlib.pyplot as plt
-                plt.close(fig)
-
-    # ---------- API ----------
-    @property
-    def params(self) -> dict:
-        p = PRESETS[self.cb.currentText()].copy()
-        p.update(seed=self.seed.value(), size=self.sz.value())
-        return p
-
-    @property
-    def out_path(self) -> str:
-        return self.path_lbl.text()
-
     @property
     def steps_val(self) -> int:
         return self.steps.value()
 
 # ───────────────────────────── main window ───────────────────────────
 class MainWindow(QWidget):
+    # one stylesheet for every card, parsed once on the window
+    _CARD_STYLE = (
+        "QPushButton#card {"
+        "  border:1px solid #444;"
+        "  border-radius:8px;"
+        "  background:#252525;"
+        "}"
+        "QPushButton#card:hover {"
+        "  background:#333;"
+        "}"
+        "QPushButton#card QLabel { color:white; }"
+        "QPushButton#card QLabel#cardTitle { font-weight:bold; }"
+        "QPushButton#card QLabel#cardDesc { color:#AAAAAA; }"
+    )
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("TerraFract")
         self.resize(720, 240)
+        self.setStyleSheet(self._CARD_STYLE)
 
         layout = QHBoxLayout(self)
         layout.setSpacing(24)
         layout.setAlignment(Qt.AlignCenter)
 
-        for label in ("Quick", "Workbench", "Timelapse", "Help"):
-            layout.addWidget(self._make_card(label))
+        cards = (
+            ("Quick",     self._on_quick),
+            ("Workbench", self._on_workbench),
+            ("Timelapse", self._on_timelapse),
+            ("Help",      self._on_help),
+        )
+        for label, slot in cards:
+            layout.addWidget(self._make_card(label, ICONS[label], DESCRIPTIONS[label], slot))
 
     # ---------- card helper ----------
-    def _make_card(self, label: str) -> QPushButton:
-        btn = QPushButton()
+    def _make_card(self, label: str, icon: str, description: str, slot) -> QPushButton:
+        btn = QPushButton(objectName="card")
         btn.setMinimumSize(160, 160)
         btn.setCursor(Qt.PointingHandCursor)
-        btn.setStyleSheet(
-            "QPushButton {"
-            "  border:1px solid #444;"
-            "  border-radius:8px;"
-            "  background:#252525;"
-            "}"
-            "QPushButton:hover {"
-            "  background:#333;"
-            "}"
-        )
 
         # inside layout
         box = QVBoxLayout(btn)
         box.setContentsMargins(12, 12, 12, 12)
 
         row = QHBoxLayout()
-        ico = QLabel(ICONS[label]); ico.setStyleSheet("color:white;")
-        title = QLabel(label); title.setStyleSheet("color:white;font-weight:bold;")
+        ico = QLabel(icon)
+        title = QLabel(label, objectName="cardTitle")
         row.addWidget(ico); row.addSpacing(6); row.addWidget(title); row.addStretch()
         box.addLayout(row)
 
-        desc = QLabel(DESCRIPTIONS[label])
+        desc = QLabel(description, objectName="cardDesc")
         desc.setWordWrap(True)
-        desc.setStyleSheet("color:#AAAAAA;")
         box.addWidget(desc, 1)
 
-        btn.clicked.connect(getattr(self, f"_on_{label.lower()}"))
+        btn.clicked.connect(slot)
         return btn
 
     # ---------- card callbacks ----------
@@ -322,15 +538,24 @@ class MainWindow(QWidget):
         dlg = _QuickDlg(self)
         if dlg.exec() != QDialog.Accepted:
             return
-        Z = generate_heightmap(**dlg.params)
-        import matplotlib.pyplot as plt
-        plt.imsave(dlg.out_path, Z, cmap="terrain")
+        # generate and save on a worker thread, then ask on the GUI thread;
+        # parented to the window so a later click cannot drop a running thread
+        quick = _QuickThread(dlg.params, dlg.out_path, parent=self)
+        quick.saved.connect(self._on_quick_saved)
+        quick.failed.connect(self._on_quick_failed)
+        quick.finished.connect(quick.deleteLater)
+        quick.start()
+
+    def _on_quick_saved(self, path: str):
         if QMessageBox.question(
             self, "Saved",
-            f"Saved to {dlg.out_path}\nOpen it?",
+            f"Saved to {path}\nOpen it?",
             QMessageBox.Yes | QMessageBox.No
         ) == QMessageBox.Yes:
-            webbrowser.open(dlg.out_path)
+            webbrowser.open(path)
+
+    def _on_quick_failed(self, message: str):
+        QMessageBox.warning(self, "Quick map failed", message)
 
     def _on_workbench(self):
         self._wb = FractalWorkbench()
@@ -341,16 +566,17 @@ class MainWindow(QWidget):
         if setup.exec() != QDialog.Accepted:
             return
 
-        # Generate the initial heightmap with the chosen parameters
-        Z = generate_heightmap(**setup.params)
-
-        # Worker thread for rendering
-        self._thread = _TimelapseThread(
-            Z,
+        # Worker thread generates the initial heightmap, then renders;
+        # parented to the window since a cancelled run may outlive the dialog
+        params = setup.params
+        thread = _TimelapseThread(
+            lambda: _full_heightmap(params),
             steps=setup.steps_val,
             interval_ms=100,
             out_path=setup.out_path,
+            parent=self,
         )
+        thread.finished.connect(thread.deleteLater)
 
         # Progress dialog
         dlg = QDialog(self)
@@ -359,22 +585,52 @@ class MainWindow(QWidget):
         bar = QProgressBar(); bar.setRange(0, 100)
         v.addWidget(bar)
         cancel = QPushButton("Cancel"); v.addWidget(cancel)
-        cancel.clicked.connect(self._thread.terminate)
-
-        self._thread.progress.connect(bar.setValue)
-        self._thread.finished.connect(lambda p: (dlg.accept(), webbrowser.open(p)))
-
-        self._thread.start()
+        cancel.clicked.connect(thread.requestInterruption)
+        dlg.rejected.connect(thread.requestInterruption)
+        thread.cancelled.connect(dlg.reject)
+        thread.failed.connect(dlg.reject)
+        thread.failed.connect(
+            lambda msg: QMessageBox.warning(self, "Timelapse failed", msg))
+
+        thread.progress.connect(bar.setValue)
+        thread.saved.connect(lambda p: (dlg.accept(), webbrowser.open(p)))
+        # QThread.finished fires however run() ends, so the dialog never hangs
+        thread.finished.connect(lambda: dlg.isVisible() and dlg.reject())
+
+        thread.start()
         dlg.exec()
 
     def _on_help(self):
         webbrowser.open("https://github.com/victorrobotxt/TerraFract")
 
+    # ---------- shutdown ----------
+    def closeEvent(self, event):
+        # quick-map and timelapse threads are children of the window;
+        # Qt aborts if one is destroyed while still running
+        threads = [t for t in self.findChildren(QThread) if t.isRunning()]
+        for t in threads:
+            t.requestInterruption()
+        for t in threads:
+            t.wait()
+        super().closeEvent(event)
+
 # ────────────────────────────── bootstrap ───────────────────────────
+def _warmup():
+    """
+    JIT-compile the Numba kernels before the first click needs them.
+    Runs off the main thread, which is only safe for interpreter exit
+    because ``terrafract._parallel`` keeps Numba off the TBB layer.
+    """
+    Z = generate_heightmap(algorithm="diamond-square", size=33, seed=0, roughness=1.0)
+    thermal_erosion(Z, iterations=1)
+    hydraulic_erosion(Z, iterations=1)
+    colorize(Z)
+
 def main():
     app = QApplication(sys.argv)
     win = MainWindow()
     win.show()
+    threading.Thread(target=_warmup, name="terrafract-warmup", daemon=True).start()
     sys.exit(app.exec())
 
 if __name__ == "__main__":
@@ -0,0 +1,29 @@
+# _parallel.py
+
+import functools
+import os
+import threading
+
+import numba
+
+# Numba's parallel kernels are entered from several threads at once
+# (launcher thumbnails and warm-up, workbench jobs, timelapse rendering).
+# Numba prefers TBB when it is installed, and TBB blocks interpreter exit
+# once a parallel kernel has run off the main thread, so the layer is
+# pinned to workqueue before the first kernel launches (an explicit
+# NUMBA_THREADING_LAYER still wins). Workqueue aborts the process on
+# concurrent use; it is safe here only because every parallel kernel
+# call goes through this one lock. Each call already spans all cores.
+if "NUMBA_THREADING_LAYER" not in os.environ:
+    numba.config.THREADING_LAYER = "workqueue"
+
+_KERNEL_LOCK = threading.RLock()
+
+
+def serialized(kernel):
+    """Wrap a parallel Numba kernel so only one thread runs kernels at a time."""
+    @functools.wraps(kernel)
+    def call(*args):
+        with _KERNEL_LOCK:
+            return kernel(*args)
+    return call
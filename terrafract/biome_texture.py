@@ -1,7 +1,13 @@
 # biome_texture.py
 
+import math
+from functools import lru_cache
+
 import numpy as np
-from scipy.ndimage import gaussian_filter, distance_transform_edt
+from scipy.ndimage import gaussian_filter1d
+from numba import njit, prange
+
+from ._parallel import serialized
 
 # Define biome categories
 BIOMES = {
@@ -23,83 +29,247 @@ BIOME_COLORS = {
     'snow':     np.array([255, 250, 250]) / 255.0   # snow
 }
 
+# (6,3) float32 colour table indexed by biome id, for single-gather colouring
+BIOME_LUT = np.ascontiguousarray(
+    np.stack([BIOME_COLORS[BIOMES[i]] for i in range(len(BIOMES))]), dtype=np.float32
+)
+
 
-def compute_slope(Z):
+@serialized
+@njit(parallel=True, fastmath=True)
+def _slope_nb(Z, out):
+    """
+    Gradient magnitude in one pass: central differences inside,
+    one-sided at the borders (as numpy.gradient).
+    """
+    n, m = Z.shape
+    for i in prange(n):
+        i0 = i - 1 if i > 0 else 0
+        i2 = i + 1 if i < n - 1 else n - 1
+        fy = 0.5 if i2 - i0 == 2 else 1.0
+        for j in range(m):
+            j0 = j - 1 if j > 0 else 0
+            j2 = j + 1 if j < m - 1 else m - 1
+            fx = 0.5 if j2 - j0 == 2 else 1.0
+            dx = fx * (Z[i, j2] - Z[i, j0])
+            dy = fy * (Z[i2, j] - Z[i0, j])
+            out[i, j] = math.sqrt(dx * dx + dy * dy)
+    return out
+
+
+@serialized
+@njit(parallel=True, fastmath=True)
+def _minmax_norm_nb(a):
+    """Rescale a in place to [0,1] (left at 0 when a is constant)."""
+    n, m = a.shape
+    row_lo = np.empty(n, dtype=a.dtype)
+    row_hi = np.empty(n, dtype=a.dtype)
+    for i in prange(n):
+        lo = a[i, 0]
+        hi = a[i, 0]
+        for j in range(1, m):
+            v = a[i, j]
+            lo = min(lo, v)
+            hi = max(hi, v)
+        row_lo[i] = lo
+        row_hi[i] = hi
+    lo = row_lo.min()
+    span = row_hi.max() - lo
+    scale = 1.0 / span if span > 0 else 0.0
+    for i in prange(n):
+        for j in range(m):
+            a[i, j] = (a[i, j] - lo) * scale
+    return a
+
+
+def compute_slope(Z, out=None):
     """
     Compute slope magnitude for each cell of the heightmap Z.
-    Uses numpy.gradient (zero-flux boundaries).
-    Returns an array of same shape with normalized slope in [0,1].
+    Central differences inside, one-sided at the borders (as numpy.gradient).
+    Returns a float32 array of same shape with normalized slope in [0,1],
+    written into ``out`` (float32, same shape) when given.
     """
-    dzdy, dzdx = np.gradient(Z)
-    slope = np.hypot(dzdx, dzdy)
-    slope -= slope.min()
-    if slope.max() > 0:
-        slope /= slope.max()
-    return slope
+    Z = np.ascontiguousarray(Z, dtype=np.float32)
+    slope = _slope_nb(Z, np.empty_like(Z) if out is None else out)
+    return _minmax_norm_nb(slope)
 
 
-def compute_wetness(Z, smoothing_sigma=3):
+def compute_wetness(Z, smoothing_sigma=3, out=None):
     """
     Approximate wetness by smoothing the inverted heightmap:
     lower elevations get higher wetness after gaussian blur.
-    Returns array in [0,1].
+    Returns float32 array in [0,1], written into ``out`` when given.
     """
-    inv = 1.0 - Z
-    wet = gaussian_filter(inv, sigma=smoothing_sigma)
-    wet -= wet.min()
-    if wet.max() > 0:
-        wet /= wet.max()
+    Z = np.ascontiguousarray(Z, dtype=np.float32)
+    # separable blur: one 1-D pass per axis into preallocated float32 buffers
+    tmp = np.empty_like(Z)
+    wet = np.empty_like(Z) if out is None else out
+    gaussian_filter1d(Z, smoothing_sigma, axis=0, output=tmp)
+    gaussian_filter1d(tmp, smoothing_sigma, axis=1, output=wet)
+    # the blur is linear, so inverting afterwards equals blurring 1 - Z;
+    # max - wet inverts and shifts the minimum to 0 in one pass
+    np.subtract(wet.max(), wet, out=wet)
+    top = wet.max()
+    if top > 0:
+        wet *= 1.0 / top
     return wet
 
+@lru_cache(maxsize=32)
+def _make_assign_biomes(water_thresh, sand_thresh, grass_thresh, rock_thresh):
+    """
+    Fused single-pass biome classification (see assign_biomes), compiled
+    once per threshold set so the thresholds fold into the kernel as
+    constants. The class is the number of thresholds z exceeds, with the
+    lowland band bumped to forest when steep or wet; no per-pixel branch.
+    Thresholds must be ascending. NaN heights exceed none and land in water.
+    """
+    @serialized
+    @njit(parallel=True)
+    def kernel(Z, slope, wetness, out):
+        n, m = Z.shape
+        for i in prange(n):
+            for j in range(m):
+                z = Z[i, j]
+                k = (np.int8(z > water_thresh) + np.int8(z > sand_thresh) +
+                     np.int8(z > grass_thresh) + np.int8(z > rock_thresh))
+                # lowland: grass unless steep or wet (lowland forest / swamp)
+                lush = (slope[i, j] < 0.5) & (wetness[i, j] < 0.6)
+                out[i, j] = k + np.int8((k == 2) & (not lush))
+        return out
+    return kernel
+
+
 def assign_biomes(Z, slope, wetness,
                   water_thresh=0.2,
                   sand_thresh=0.3,
                   grass_thresh=0.6,
                   forest_thresh=0.8,
-                  rock_thresh=0.9):
+                  rock_thresh=0.9,
+                  out=None):
     """
     Assign a biome index based on height, slope, and wetness.
-    Returns an int array of same shape with values 0..5.
+    Returns an int array of same shape with values 0..5, written into
+    ``out`` (int8, same shape) when given.
     Wetness is now used to split grass vs. forest/swamp.
     """
-    n, m = Z.shape
-    biomes = np.zeros((n, m), dtype=np.int8)
+    kernel = _make_assign_biomes(float(water_thresh), float(sand_thresh),
+                                 float(grass_thresh), float(rock_thresh))
+    biomes = np.empty(Z.shape, dtype=np.int8) if out is None else out
+    return kernel(Z, slope, wetness, biomes)
+
+
+def biome_colormap(biome_indices):
+    """
+    Map biome indices array to an RGB image.
+    Returns a (n,m,3) float32 array.
+    """
+    return np.take(BIOME_LUT, biome_indices, axis=0)
 
-    # Water
-    biomes[Z <= water_thresh] = 0
 
-    # Sand on shore
-    mask = (Z > water_thresh) & (Z <= sand_thresh)
-    biomes[mask] = 1
+# 3-tap Gaussian (sigma=0.3, radius 1) used to soften biome boundaries;
+# normalized the same way scipy.ndimage.gaussian_filter builds its kernel
+_AA_SIGMA = 0.3
+_AA_SIDE_WEIGHT = float(np.exp(-0.5 / _AA_SIGMA**2) / (1 + 2 * np.exp(-0.5 / _AA_SIGMA**2)))
 
-    # Grasslands / lowland forest (swamp) split by slope & wetness
-    lowland = (Z > sand_thresh) & (Z <= grass_thresh)
-    grass_mask = lowland & (slope < 0.5) & (wetness < 0.6)
-    forest_lowland = lowland & ~grass_mask
-    biomes[grass_mask] = 2
-    biomes[forest_lowland] = 3
 
-    # “High” forest: elevations above grass_thresh up to rock_thresh
-    forest_high = (Z > grass_thresh) & (Z <= rock_thresh)
-    biomes[forest_high] = 3
+@njit
+def _water_dist_nb(biomes, i, j, radius):
+    """
+    Euclidean distance from (i, j) to the nearest water cell, searching
+    only the (2*radius+1)^2 window around it; inf if none is that close.
+    """
+    n, m = biomes.shape
+    best = np.inf
+    for di in range(-radius, radius + 1):
+        ii = i + di
+        if ii < 0 or ii >= n:
+            continue
+        for dj in range(-radius, radius + 1):
+            jj = j + dj
+            if jj < 0 or jj >= m or biomes[ii, jj] != 0:
+                continue
+            d2 = di * di + dj * dj
+            if d2 < best:
+                best = d2
+    return math.sqrt(best)
 
-    # Rock: anything above rock_thresh
-    biomes[Z > rock_thresh] = 4
 
-    return biomes
+# rows per render tile: a tile's shaded colours (plus a 1-row halo each
+# side) stay resident in L2 while its anti-aliasing pass reads them back
+_TILE_ROWS = 64
 
 
-def biome_colormap(biome_indices):
+@njit
+def _shade_row_nb(Z, biomes, lut, coastal_width, i, row):
     """
-    Map biome indices array to an RGB image.
-    Returns a (n,m,3) float array.
+    Colour one row into row (m,3): biome colour, sand blended toward water
+    within coastal_width cells of the shore, height shading 0.7 + 0.3*Z,
+    clipped to [0,1].
     """
-    n, m = biome_indices.shape
-    rgb = np.zeros((n, m, 3), dtype=np.float32)
-    for idx, name in BIOMES.items():
-        mask = (biome_indices == idx)
-        rgb[mask] = BIOME_COLORS[name]
-    return rgb
+    m = Z.shape[1]
+    radius = int(coastal_width)
+    for j in range(m):
+        b = biomes[i, j]
+        shade = 0.7 + 0.3 * Z[i, j]
+        coast = False
+        t = 0.0
+        if coastal_width > 0 and b == 1:
+            d = _water_dist_nb(biomes, i, j, radius)
+            if d <= coastal_width:
+                coast = True
+                t = min(max(d / coastal_width, 0.0), 1.0)
+        for c in range(3):
+            v = lut[b, c]
+            if coast:
+                v = t * lut[1, c] + (1.0 - t) * lut[0, c]
+            row[j, c] = min(max(v * shade, 0.0), 1.0)
+
+
+@serialized
+@njit(parallel=True, fastmath=True)
+def _render_biomes_nb(Z, biomes, lut, coastal_width, w_side, tile, out):
+    """
+    Fused, row-tiled colour pipeline for synthesize_biomes.
+    Each tile shades its rows plus a 1-row halo into a small scratch
+    buffer, then writes out: on edge cells (any 4-neighbour in another
+    biome) 70% colour mixed with 30% of a 3x3 Gaussian blur of the shaded
+    image (clamped borders); elsewhere the shaded colour as is.
+    """
+    n, m = Z.shape
+    w_mid = 1.0 - 2.0 * w_side
+    n_tiles = (n + tile - 1) // tile
+    for t in prange(n_tiles):
+        r0 = t * tile
+        r1 = min(r0 + tile, n)
+        h0 = max(r0 - 1, 0)
+        h1 = min(r1 + 1, n)
+        shaded = np.empty((h1 - h0, m, 3), dtype=out.dtype)
+        for i in range(h0, h1):
+            _shade_row_nb(Z, biomes, lut, coastal_width, i, shaded[i - h0])
+
+        for i in range(r0, r1):
+            i0 = (i - 1 if i > 0 else 0) - h0
+            i1 = i - h0
+            i2 = (i + 1 if i < n - 1 else n - 1) - h0
+            for j in range(m):
+                b = biomes[i, j]
+                edge = ((i > 0 and biomes[i - 1, j] != b) or
+                        (i < n - 1 and biomes[i + 1, j] != b) or
+                        (j > 0 and biomes[i, j - 1] != b) or
+                        (j < m - 1 and biomes[i, j + 1] != b))
+                if not edge:
+                    for c in range(3):
+                        out[i, j, c] = shaded[i1, j, c]
+                    continue
+                j0 = j - 1 if j > 0 else 0
+                j2 = j + 1 if j < m - 1 else m - 1
+                for c in range(3):
+                    c0 = w_side * shaded[i0, j0, c] + w_mid * shaded[i1, j0, c] + w_side * shaded[i2, j0, c]
+                    c1 = w_side * shaded[i0, j, c] + w_mid * shaded[i1, j, c] + w_side * shaded[i2, j, c]
+                    c2 = w_side * shaded[i0, j2, c] + w_mid * shaded[i1, j2, c] + w_side * shaded[i2, j2, c]
+                    blur = w_side * c0 + w_mid * c1 + w_side * c2
+                    out[i, j, c] = 0.7 * shaded[i1, j, c] + 0.3 * blur
+    return out
 
 
 def synthesize_biomes(Z, smoothing_sigma=3,
@@ -108,7 +278,9 @@ def synthesize_biomes(Z, smoothing_sigma=3,
                       grass_thresh=0.6,
                       forest_thresh=0.8,
                       rock_thresh=0.9,
-                      coastal_width=2):
+                      coastal_width=2,
+                      out_rgb=None,
+                      out_biomes=None):
     """
     Full pipeline: given heightmap Z, compute slope & wetness,
     assign biomes, apply coastal wet-sand buffer, height-based shading,
@@ -119,10 +291,19 @@ def synthesize_biomes(Z, smoothing_sigma=3,
       smoothing_sigma - for wetness smoothing
       *_thresh      - elevation thresholds
       coastal_width - buffer distance (in cells) for wet sand effect
+      out_rgb, out_biomes - optional preallocated (n,m,3) float32 and
+                      (n,m) int8 buffers to write into, so repeated calls
+                      on one grid size need not allocate them
     Returns:
-      rgb   - (n,m,3) float array
+      rgb   - (n,m,3) float32 array
       biomes - (n,m) int map
+
+    The whole pipeline runs in float32: Z is copied on entry into a
+    C-contiguous float32 array if it is not one already (Fortran-ordered
+    or strided views included), so the kernels always walk rows in order.
     """
+    Z = np.ascontiguousarray(Z, dtype=np.float32)
+
     # Compute slope and wetness
     slope = compute_slope(Z)
     wetness = compute_wetness(Z, smoothing_sigma=smoothing_sigma)
@@ -131,33 +312,13 @@ def synthesize_biomes(Z, smoothing_sigma=3,
                            sand_thresh,
                            grass_thresh,
                            forest_thresh,
-                           rock_thresh)
-
-    # Base RGB map
-    rgb = biome_colormap(biomes)
-
-    # Coastal wet-sand buffer: blend sand toward water near shore
-    water_mask = (biomes == 0)
-    dist = distance_transform_edt(~water_mask)
-    sand_mask = (biomes == 1)
-    coast_mask = sand_mask & (dist <= coastal_width)
-    if coastal_width > 0:
-        t = (dist[coast_mask] / coastal_width).clip(0,1)
-        sand_color = BIOME_COLORS['sand']
-        water_color = BIOME_COLORS['water']
-        rgb[coast_mask] = (t[:,None] * sand_color) + ((1-t)[:,None] * water_color)
-
-    # Height-based shading
-    shade = 0.7 + 0.3 * Z[..., np.newaxis]
-    rgb = np.clip(rgb * shade, 0.0, 1.0)
-
-    # Anti-alias biome boundaries
-    b = biomes
-    b_p = np.pad(b, pad_width=1, mode='edge')
-    edge = np.zeros_like(b, dtype=bool)
-    for di, dj in [(-1,0), (1,0), (0,-1), (0,1)]:
-        edge |= b != b_p[1+di:1+di+b.shape[0], 1+dj:1+dj+b.shape[1]]
-    blur_rgb = gaussian_filter(rgb, sigma=(0.3, 0.3, 0))
-    rgb[edge] = 0.7 * rgb[edge] + 0.3 * blur_rgb[edge]
+                           rock_thresh,
+                           out=out_biomes)
+
+    # Colour, coastal blend, height shading and edge AA, tile by tile;
+    # slope and wetness stay whole-image since both are normalised globally
+    rgb = np.empty(Z.shape + (3,), dtype=np.float32) if out_rgb is None else out_rgb
+    _render_biomes_nb(Z, biomes, BIOME_LUT, coastal_width,
+                      _AA_SIDE_WEIGHT, _TILE_ROWS, rgb)
 
     return rgb, biomes
@@ -1,33 +1,200 @@
 # File: terrafract/fractal_workbench.py
 
+import contextlib
+import math
 import os
-import random
+from collections import OrderedDict
+from functools import lru_cache
 
 import numpy as np
+from numba import njit
 from PySide6 import QtCore, QtWidgets
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
 from .heightmap_generators import generate_heightmap
+from .palette import colorize
+from .spectral import radial_power_spectrum
+
+# Optional GPU surface view; without it the 3D terrain is drawn by Matplotlib
+try:
+    import pyqtgraph.opengl as gl
+except ImportError:
+    gl = None
+
+
+@njit
+def _put_uint(buf, pos, v):
+    """Write the decimal digits of v >= 0 at buf[pos]; return the new end."""
+    n = 1
+    t = v // 10
+    while t > 0:
+        n += 1
+        t //= 10
+    for k in range(n - 1, -1, -1):
+        buf[pos + k] = 48 + v % 10
+        v //= 10
+    return pos + n
+
+
+@njit
+def _put_fixed4(buf, pos, z):
+    """
+    Write z like "%.4f" at buf[pos]; return the new end.
+    Rounds z*10**4 half-to-even, which is exact (and so identical to
+    %-formatting) for float32 heights, whose products fit a double.
+    """
+    if z != z:
+        buf[pos] = 110; buf[pos + 1] = 97; buf[pos + 2] = 110   # nan
+        return pos + 3
+    if math.copysign(1.0, z) < 0:
+        buf[pos] = 45   # '-'
+        pos += 1
+        z = -z
+    if z == math.inf:
+        buf[pos] = 105; buf[pos + 1] = 110; buf[pos + 2] = 102   # inf
+        return pos + 3
+    q = np.int64(np.rint(z * 10000.0))
+    pos = _put_uint(buf, pos, q // 10000)
+    buf[pos] = 46   # '.'
+    frac = q % 10000
+    for k in range(4, 0, -1):
+        buf[pos + k] = 48 + frac % 10
+        frac //= 10
+    return pos + 5
+
+
+@njit
+def _format_vertices_nb(Z, buf):
+    """Format "v j i z" per cell of Z into the uint8 buffer buf; return bytes used."""
+    h, w = Z.shape
+    pos = 0
+    for i in range(h):
+        for j in range(w):
+            buf[pos] = 118; buf[pos + 1] = 32   # 'v '
+            pos = _put_uint(buf, pos + 2, j)
+            buf[pos] = 32
+            pos = _put_uint(buf, pos + 1, i)
+            buf[pos] = 32
+            pos = _put_fixed4(buf, pos + 1, Z[i, j])
+            buf[pos] = 10
+            pos += 1
+    return pos
+
+
+@njit
+def _format_faces_nb(h, w, buf):
+    """
+    Format "f v1 v2 v4 v3" (1-based) per square of an h x w vertex grid
+    into buf; return bytes used.
+    """
+    pos = 0
+    for i in range(h - 1):
+        for j in range(w - 1):
+            v1 = i * w + j + 1
+            buf[pos] = 102; buf[pos + 1] = 32   # 'f '
+            pos = _put_uint(buf, pos + 2, v1)
+            buf[pos] = 32
+            pos = _put_uint(buf, pos + 1, v1 + 1)
+            buf[pos] = 32
+            pos = _put_uint(buf, pos + 1, v1 + w + 1)
+            buf[pos] = 32
+            pos = _put_uint(buf, pos + 1, v1 + w)
+            buf[pos] = 10
+            pos += 1
+    return pos
+
+
+@lru_cache(maxsize=4)
+def _obj_faces(h, w):
+    """The face block of an h x w grid mesh; fixed by the shape, so built once."""
+    v_len = len(str(h * w))
+    buf = np.empty((h - 1) * (w - 1) * (4 * v_len + 6), dtype=np.uint8)
+    return buf[:_format_faces_nb(h, w, buf)].tobytes()
+
+
+def _write_obj(path, Z):
+    """
+    Write Z as a quad-mesh OBJ: one vertex (x, y, height) per cell and one
+    face per grid square. The vertices are formatted by a Numba kernel into
+    one buffer; the faces only depend on the grid and come from a cache.
+    """
+    h, w = Z.shape
+    top = np.abs(Z[np.isfinite(Z)]).max(initial=0.0)
+    # [-]int.dddd, plus a digit for values that round up one (9.99999 -> 10.0000);
+    # also covers "nan" and "-inf"
+    z_len = len(str(int(top))) + 7
+    v_len = len(str(max(h, w)))               # widest coordinate
+    buf = np.empty(h * w * (2 * v_len + z_len + 5), dtype=np.uint8)
+    n = _format_vertices_nb(Z, buf)
+    with open(path, 'wb') as f:
+        f.write(buf[:n].data)
+        f.write(_obj_faces(h, w))
+
+
+# the 3D preview is drawn from at most this many samples per axis
+SURFACE_SAMPLES = 64
+
+
+def _surface_step(shape):
+    return -(-max(shape) // SURFACE_SAMPLES)
+
+
+def _surface_quads(X, Y, Z):
+    """
+    (N,4,3) cell quads in plot_surface's vertex order (perimeter of each
+    2x2 block), for updating an existing surface with set_verts.
+    """
+    P = np.stack([X, Y, Z], axis=-1)
+    return np.stack([P[:-1, :-1], P[:-1, 1:], P[1:, 1:], P[1:, :-1]],
+                    axis=2).reshape(-1, 4, 3)
+
+
+class _MapSignals(QtCore.QObject):
+    done = QtCore.Signal(int, object, object, object)   # generation, key, Z, (freqs, power)
+    failed = QtCore.Signal(int, str)                     # generation, error message
+
+
+class _MapJob(QtCore.QRunnable):
+    """Generate a workbench map and its spectrum on the global thread pool."""
+
+    def __init__(self, generation: int, key: tuple, spectrum: bool = True):
+        super().__init__()
+        self.generation = generation
+        self.key = key
+        self.spectrum = spectrum   # skip the FFT while the spectrum is hidden
+        self.signals = _MapSignals()
+
+    def run(self):
+        try:
+            Z = generate_heightmap(**dict(self.key))
+            radial = radial_power_spectrum(Z, dtype=np.float32) if self.spectrum else None
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        self.signals.done.emit(self.generation, self.key, Z, radial)
+
+
+if gl is not None:
+    class _LockedElevationView(gl.GLViewWidget):
+        """GL view that orbits around the terrain without tilting up/down."""
+
+        def orbit(self, azim, elev):
+            super().orbit(azim, 0)
 
 
 class _Debounce(QtCore.QObject):
-    """Call a slot once after inactivity (bundles rapid signals)."""
+    """Call ``slot`` once after inactivity (bundles rapid signals)."""
 
-    def __init__(self, delay_ms=200, parent=None):
+    def __init__(self, slot, delay_ms=200, parent=None):
         super().__init__(parent)
         self._timer = QtCore.QTimer(self, singleShot=True, interval=delay_ms)
-        self._timer.timeout.connect(self._emit)
-        self._slot = None
+        self._timer.timeout.connect(slot)
 
-    def trigger(self, slot):
-        self._slot = slot
+    def trigger(self, *_):
+        """(Re)start the countdown; accepts and ignores any signal arguments."""
         self._timer.start()
 
-    def _emit(self):
-        if self._slot:
-            self._slot()
-
 
 class FractalWorkbench(QtWidgets.QMainWindow):
     """Simplified yet powerful terrain workbench."""
@@ -39,25 +206,33 @@ class FractalWorkbench(QtWidgets.QMainWindow):
         "Fjords":    {"algo": "fbm",           "octaves": 6, "persistence": 0.4, "scale": 40.0, "hydro_iters": 30},
     }
 
+    MAP_CACHE_SIZE = 4   # recent maps + spectra kept for flipping back and forth
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("TerraFract Workbench")
         self.resize(1024, 720)
         os.makedirs("exports", exist_ok=True)
 
-        self._debounce = _Debounce(parent=self)
+        self._debounce = _Debounce(self.update, parent=self)
+        self._rng = np.random.default_rng()   # draws preset / random seeds
+        self._grids: dict[tuple[tuple[int, int], int], list[np.ndarray]] = {}
+        self._maps: OrderedDict[tuple, tuple[np.ndarray, tuple | None]] = OrderedDict()
+        self._last_key = None
+        self._generation = 0   # bumped per dispatched render
+        self._Z = None         # map on screen, set once the first render lands
+        self._surf = None      # Matplotlib surface artist, reused while the grid holds
+        self._surf_grid = None  # (map shape, stride) the artist was built for
         self._build_ui()
+        self._algo = self.s_algo.currentText()   # kept in step by _on_algo_changed
 
         # Wire up dynamic behavior
         self.s_algo.currentTextChanged.connect(self._on_algo_changed)
-        self.s_rough.valueChanged.connect(self._sync_simple_to_advanced)
-        self.a_pers.valueChanged.connect(self._sync_advanced_to_simple)
-        self.s_rough.valueChanged.connect(self._sync_simple_to_ds)
-        self.a_ds_rough.valueChanged.connect(self._sync_ds_to_simple)
+        for w in (self.s_rough, self.a_pers, self.a_ds_rough):
+            w.valueChanged.connect(self._sync)
 
-        # Apply default preset and enforce initial show/hide
+        # Apply default preset (also sets the initial show/hide)
         self.apply_preset("Mountains")
-        self._on_algo_changed(self.s_algo.currentText())
 
     def _build_ui(self):
         central = QtWidgets.QWidget()
@@ -76,6 +251,14 @@ class FractalWorkbench(QtWidgets.QMainWindow):
         rnd.clicked.connect(self.random_seed)
         bar.addWidget(rnd)
 
+        # view toggles: drop the FFT, or halve the 3D resolution, while iterating
+        self.show_ps = QtWidgets.QCheckBox("Spectrum", checked=True)
+        self.show_ps.toggled.connect(self._on_view_toggled)
+        bar.addWidget(self.show_ps)
+        self.fast_preview = QtWidgets.QCheckBox("Fast preview")
+        self.fast_preview.toggled.connect(self._on_view_toggled)
+        bar.addWidget(self.fast_preview)
+
         bar.addStretch()
         vbox.addLayout(bar)
 
@@ -85,13 +268,37 @@ class FractalWorkbench(QtWidgets.QMainWindow):
         self._make_simple_tab()
         self._make_adv_tab()
 
-        # ── Matplotlib canvas ────────────────────────────────────
+        # ── Terrain view + Matplotlib canvas ─────────────────────
         self.fig = Figure(figsize=(9, 6))
-        self.ax3d = self.fig.add_subplot(121, projection='3d')
-        self.ax_ps = self.fig.add_subplot(122)
-        self.fig.subplots_adjust(wspace=0.35)
-        self.canvas = FigureCanvas(self.fig)
-        vbox.addWidget(self.canvas, 10)
+        if gl is not None:
+            # GPU surface on the left, power spectrum alone in the figure
+            self._gl_view = _LockedElevationView()
+            self._gl_view.setCameraPosition(distance=4, elevation=30)
+            self._gl_surf = gl.GLSurfacePlotItem(computeNormals=False)
+            self._gl_surf.translate(0, 0, -0.5)
+            self._gl_view.addItem(self._gl_surf)
+            self.ax_ps = self.fig.add_subplot(111)
+            self.canvas = FigureCanvas(self.fig)
+            views = QtWidgets.QHBoxLayout()
+            views.addWidget(self._gl_view, 1)
+            views.addWidget(self.canvas, 1)
+            vbox.addLayout(views, 10)
+        else:
+            self._gl_view = None
+            self.ax3d = self.fig.add_subplot(121, projection='3d')
+            self.ax_ps = self.fig.add_subplot(122)
+            self.fig.subplots_adjust(wspace=0.35)
+            self.canvas = FigureCanvas(self.fig)
+            vbox.addWidget(self.canvas, 10)
+
+        # Power spectrum: one persistent line on linear axes, fed log10
+        # values by _draw so no log-scale transform runs per redraw
+        self._ps_line, = self.ax_ps.plot([], [])
+        self.ax_ps.set_title('Power Spectrum')
+        self.ax_ps.set_xlabel('log10 Frequency')
+        self.ax_ps.set_ylabel('log10 Power')
+        self._ps_background = None   # axes snapshot without the line, for blitting
+        self.canvas.mpl_connect('resize_event', self._drop_ps_background)
 
         # ── Export button ────────────────────────────────────────
         exp_bar = QtWidgets.QHBoxLayout()
@@ -102,7 +309,8 @@ class FractalWorkbench(QtWidgets.QMainWindow):
         vbox.addLayout(exp_bar)
 
         # Prevent the 3D plot from tilting up/down
-        self._install_rotation_lock()
+        if self._gl_view is None:
+            self._install_rotation_lock()
 
     def _make_simple_tab(self):
         w = QtWidgets.QWidget()
@@ -112,20 +320,20 @@ class FractalWorkbench(QtWidgets.QMainWindow):
         # Algorithm selector
         self.s_algo = QtWidgets.QComboBox()
         self.s_algo.addItems(["diamond-square", "fbm"])
-        self.s_algo.currentTextChanged.connect(lambda _: self._debounce.trigger(self.update))
+        self.s_algo.currentTextChanged.connect(self._debounce.trigger)
         form.addRow("Algorithm:", self.s_algo)
 
         # Single slider (Roughness or Persistence)
         self.s_rough = QtWidgets.QSlider(QtCore.Qt.Horizontal)
         self.s_rough.setRange(1, 100)
         self.s_rough.setValue(30)
-        self.s_rough.valueChanged.connect(lambda _: self._debounce.trigger(self.update))
+        self.s_rough.valueChanged.connect(self._debounce.trigger)
         form.addRow("Roughness:", self.s_rough)
 
         # Seed spinner
         self.s_seed = QtWidgets.QSpinBox()
         self.s_seed.setRange(0, 9999)
-        self.s_seed.valueChanged.connect(lambda _: self._debounce.trigger(self.update))
+        self.s_seed.valueChanged.connect(self._debounce.trigger)
         form.addRow("Seed:", self.s_seed)
 
         self.tabs.addTab(w, "Simple")
@@ -144,51 +352,62 @@ class FractalWorkbench(QtWidgets.QMainWindow):
         self.a_ds_rough.setRange(0.1, 2.0)
         self.a_ds_rough.setSingleStep(0.1)
         self.a_ds_rough.setValue(1.0)
-        self.a_ds_rough.valueChanged.connect(lambda _: self._debounce.trigger(self.update))
+        self.a_ds_rough.valueChanged.connect(self._debounce.trigger)
         form.addRow("DS roughness:", self.a_ds_rough)
 
         # FBM parameters
         self.a_oct = QtWidgets.QSpinBox()
         self.a_oct.setRange(1, 10)
         self.a_oct.setValue(6)
-        self.a_oct.valueChanged.connect(lambda _: self._debounce.trigger(self.update))
+        self.a_oct.valueChanged.connect(self._debounce.trigger)
         form.addRow("FBM octaves:", self.a_oct)
 
         self.a_pers = QtWidgets.QDoubleSpinBox()
         self.a_pers.setRange(0.0, 1.0)
         self.a_pers.setSingleStep(0.1)
         self.a_pers.setValue(0.5)
-        self.a_pers.valueChanged.connect(lambda _: self._debounce.trigger(self.update))
+        self.a_pers.valueChanged.connect(self._debounce.trigger)
         form.addRow("FBM persistence:", self.a_pers)
 
         self.a_lac = QtWidgets.QDoubleSpinBox()
         self.a_lac.setRange(1.0, 4.0)
         self.a_lac.setSingleStep(0.1)
         self.a_lac.setValue(2.0)
-        self.a_lac.valueChanged.connect(lambda _: self._debounce.trigger(self.update))
+        self.a_lac.valueChanged.connect(self._debounce.trigger)
         form.addRow("FBM lacunarity:", self.a_lac)
 
         self.tabs.addTab(w, "Advanced")
 
     def apply_preset(self, name: str):
         p = self.PRESETS[name]
-        with QtCore.QSignalBlocker(self):
+        with contextlib.ExitStack() as stack:
+            for w in (self.s_algo, self.s_seed, self.a_ds_rough,
+                      self.a_oct, self.a_pers, self.a_lac):
+                stack.enter_context(QtCore.QSignalBlocker(w))
             self.s_algo.setCurrentText(p.get('algo', 'diamond-square'))
-            self.s_seed.setValue(random.randint(0, 9999))
+            self.s_seed.setValue(self._new_seed())
             self.a_ds_rough.setValue(p.get('roughness', 1.0))
             self.a_oct.setValue(p.get('octaves', 6))
             self.a_pers.setValue(p.get('persistence', 0.5))
             self.a_lac.setValue(p.get('lacunarity', 2.0))
-        self.update()
+        # the blocked signals drove these; run them once, ending in one debounced render
+        self._on_algo_changed(self.s_algo.currentText())
+        self._sync_slider()
+
+    def _new_seed(self) -> int:
+        """Next seed for the seed box (0-9999) from the window's generator."""
+        return int(self._rng.integers(0, 10000))
 
     def random_seed(self):
         """Always immediately re-render with a new seed."""
-        new_seed = random.randint(0, 9999)
+        new_seed = self._new_seed()
         self.s_seed.setValue(new_seed)
         self.update()
 
     def _on_algo_changed(self, text: str):
         """Handle algorithm switch: relabel simple slider and show/hide advanced controls."""
+        self._algo = text
+
         # Simple tab relabel
         lbl = self.simple_form.labelForField(self.s_rough)
         lbl.setText("Roughness:" if text == 'diamond-square' else "Persistence:")
@@ -215,45 +434,39 @@ class FractalWorkbench(QtWidgets.QMainWindow):
             lac_lbl.show();  lac_wid.show()
 
         # Trigger a re-render
-        self._debounce.trigger(self.update)
-
-    def _sync_simple_to_advanced(self, slider_val: int):
-        """Sync simple slider → advanced persistence (FBM only)."""
-        if self.s_algo.currentText() != "fbm":
-            return
-        p = slider_val / self.s_rough.maximum()
-        with QtCore.QSignalBlocker(self.a_pers):
-            self.a_pers.setValue(p)
-
-    def _sync_advanced_to_simple(self, pers_val: float):
-        """Sync advanced persistence → simple slider (FBM only)."""
-        if self.s_algo.currentText() != "fbm":
+        self._debounce.trigger()
+
+    def _sync(self, val):
+        """
+        Keep the simple slider and the active algorithm's advanced control
+        in step: persistence for FBM, DS roughness for diamond-square.
+        """
+        src = self.sender()
+        fbm = self._algo == 'fbm'
+        if src is self.s_rough:
+            if fbm:
+                dst, v = self.a_pers, val / self.s_rough.maximum()
+            else:
+                dst, v = self.a_ds_rough, max(0.1, min(val / 50.0, self.a_ds_rough.maximum()))
+        elif src is (self.a_pers if fbm else self.a_ds_rough):
+            self._sync_slider()
             return
-        s = int(round(pers_val * self.s_rough.maximum()))
-        s = max(self.s_rough.minimum(), min(s, self.s_rough.maximum()))
-        with QtCore.QSignalBlocker(self.s_rough):
-            self.s_rough.setValue(s)
-
-    def _sync_simple_to_ds(self, slider_val: int):
-        """Sync simple slider → advanced DS roughness (DS only)."""
-        if self.s_algo.currentText() != "diamond-square":
-            return
-        r = slider_val / 50.0
-        r = max(0.1, min(r, self.a_ds_rough.maximum()))
-        with QtCore.QSignalBlocker(self.a_ds_rough):
-            self.a_ds_rough.setValue(r)
-
-    def _sync_ds_to_simple(self, ds_val: float):
-        """Sync advanced DS roughness → simple slider (DS only)."""
-        if self.s_algo.currentText() != "diamond-square":
-            return
-        s = int(round(ds_val * 50.0))
-        s = max(self.s_rough.minimum(), min(s, self.s_rough.maximum()))
+        else:
+            return   # control of the inactive algorithm
+        with QtCore.QSignalBlocker(dst):
+            dst.setValue(v)
+
+    def _sync_slider(self):
+        """Point the simple slider at the active algorithm's advanced control."""
+        fbm = self._algo == 'fbm'
+        val = self.a_pers.value() if fbm else self.a_ds_rough.value()
+        v = int(round(val * (self.s_rough.maximum() if fbm else 50.0)))
+        v = max(self.s_rough.minimum(), min(v, self.s_rough.maximum()))
         with QtCore.QSignalBlocker(self.s_rough):
-            self.s_rough.setValue(s)
+            self.s_rough.setValue(v)
 
     def _params(self) -> dict:
-        algo = self.s_algo.currentText()
+        algo = self._algo
         seed = self.s_seed.value()
 
         if algo == 'diamond-square':
@@ -279,36 +492,138 @@ class FractalWorkbench(QtWidgets.QMainWindow):
 
     def update(self):
         p = self._params()
-        Z = generate_heightmap(**p)
+        key = tuple(sorted(p.items()))
+        if key == self._last_key:
+            return   # nothing changed since the last render
+        self._last_key = key
+        self._generation += 1
+        spectrum = self.show_ps.isChecked()
+        hit = self._maps.get(key)
+        if hit is not None:
+            self._maps.move_to_end(key)
+            Z, radial = hit
+            if spectrum and radial is None:   # cached while the spectrum was off
+                radial = radial_power_spectrum(Z, dtype=np.float32)
+                self._maps[key] = (Z, radial)
+            self._draw(Z, radial if spectrum else None)
+            return
+        # generate + FFT off the GUI thread; _on_map draws the newest result
+        job = _MapJob(self._generation, key, spectrum)
+        job.signals.done.connect(self._on_map)
+        job.signals.failed.connect(self._on_map_failed)
+        QtCore.QThreadPool.globalInstance().start(job)
+
+    def _on_map(self, generation: int, key: tuple, Z: np.ndarray, radial: tuple | None):
+        self._maps[key] = (Z, radial)
+        if len(self._maps) > self.MAP_CACHE_SIZE:
+            self._maps.popitem(last=False)
+        if generation == self._generation:   # drop superseded renders
+            self._draw(Z, radial)
+
+    def _on_map_failed(self, generation: int, message: str):
+        if generation != self._generation:
+            return   # a newer render is already on its way
+        self._last_key = None   # let the same parameters be retried
+        QtWidgets.QMessageBox.warning(self, 'Generation failed', message)
+
+    def _on_view_toggled(self, *_):
+        show = self.show_ps.isChecked()
+        self.ax_ps.set_visible(show)
+        if self._gl_view is not None:
+            self.canvas.setVisible(show)   # the figure holds only the spectrum
+        self._last_key = None   # same parameters, new view: draw again
+        self.update()
+
+    def _draw(self, Z: np.ndarray, radial: tuple | None):
+        """Show Z; radial is (freqs, power), or None while the spectrum is hidden."""
         self._Z = Z
+        lod = 2 if self.fast_preview.isChecked() else 1
 
         # 3D surface
-        X, Y = np.meshgrid(range(Z.shape[1]), range(Z.shape[0]))
-        self.ax3d.clear()
-        self.ax3d.plot_surface(X, Y, Z, cmap='terrain',
-                               linewidth=0, antialiased=False)
-        self.ax3d.set_axis_off()
-        self.ax3d.set_title('Terrain')
+        if self._gl_view is not None:
+            self._update_gl_surface(Z[::lod, ::lod])
+        else:
+            # a strided preview; self._Z stays full-res for export
+            step = _surface_step(Z.shape) * lod
+            Zv = Z[::step, ::step]
+            X, Y = self._surface_grid(Z.shape, step)
+            if self._surf is not None and self._surf_grid == (Z.shape, step):
+                # same grid: move the existing polygons, recolour by mean height
+                quads = _surface_quads(X, Y, Zv)
+                self._surf.set_verts(quads)
+                self._surf.set_array(quads[..., 2].mean(axis=-1))
+            else:
+                self.ax3d.clear()
+                self._surf = self.ax3d.plot_surface(
+                    X, Y, Zv, cmap='terrain', vmin=0, vmax=1,
+                    rcount=Zv.shape[0], ccount=Zv.shape[1],
+                    linewidth=0, antialiased=False)
+                self._surf_grid = (Z.shape, step)
+                # maps are normalised, so the limits only change with the grid
+                self.ax3d.set_zlim(0, 1)
+                self.ax3d.set_autoscale_on(False)
+                self.ax3d.set_axis_off()
+                self.ax3d.set_title('Terrain')
+
+        if radial is None:
+            if self._gl_view is None:
+                self.canvas.draw_idle()
+            return
 
         # Power spectrum
-        self.ax_ps.clear()
-        F = np.fft.fftshift(np.fft.fft2(Z))
-        P = np.abs(F)**2
-        cy, cx = [s // 2 for s in P.shape]
-        y, x = np.indices(P.shape)
-        r = np.sqrt((x - cx)**2 + (y - cy)**2).astype(int)
-        tbin = np.bincount(r.ravel(), P.ravel())
-        nr   = np.bincount(r.ravel())
-        radial = tbin / np.maximum(nr, 1)
-        freqs  = np.arange(len(radial))
-        self.ax_ps.loglog(freqs[1:], radial[1:])
-        self.ax_ps.set_title('Power Spectrum')
-        self.ax_ps.set_xlabel('Frequency')
-        self.ax_ps.set_ylabel('Power')
+        freqs, power = radial
+        log_f = np.log10(freqs)
+        log_p = np.log10(np.maximum(power, 1e-30))
+        self._ps_line.set_data(log_f, log_p)
+        lo, hi = log_p.min(), log_p.max()
+        y0, y1 = self.ax_ps.get_ylim()
+        refit = self.ax_ps.get_xlim() != (0, log_f[-1]) or lo < y0 or hi > y1
+        if refit:
+            # a decade of headroom so nearby maps fit without another relayout
+            self.ax_ps.set_xlim(0, log_f[-1])
+            self.ax_ps.set_ylim(lo - 1, hi + 1)
+
+        if self._gl_view is None:
+            self.canvas.draw_idle()   # the 3D axes changed too
+        elif refit or self._ps_background is None:
+            self._ps_line.set_visible(False)
+            self.canvas.draw()
+            self._ps_background = self.canvas.copy_from_bbox(self.ax_ps.bbox)
+            self._ps_line.set_visible(True)
+            self._blit_ps_line()
+        else:
+            self.canvas.restore_region(self._ps_background)
+            self._blit_ps_line()
+
+    def _blit_ps_line(self):
+        self.ax_ps.draw_artist(self._ps_line)
+        self.canvas.blit(self.ax_ps.bbox)
+
+    def _drop_ps_background(self, _event):
+        self._ps_background = None
 
-        self.canvas.draw_idle()
+    def _update_gl_surface(self, Z):
+        """Upload Z and its terrain colours to the GL surface item."""
+        h, w = Z.shape
+        rgba = np.empty((h, w, 4), dtype=np.float32)
+        rgba[..., :3] = colorize(Z, vmin=0, vmax=1)
+        rgba[..., :3] *= 1.0 / 255
+        rgba[..., 3] = 1.0
+        # unit footprint whatever the map size, heights in [0,1]
+        self._gl_surf.setData(x=np.linspace(-1, 1, h), y=np.linspace(-1, 1, w),
+                              z=Z, colors=rgba)
+
+    def _surface_grid(self, shape, step):
+        """X, Y cell coordinates of the surface preview, built once per shape and stride."""
+        grid = self._grids.get((shape, step))
+        if grid is None:
+            grid = self._grids[shape, step] = np.meshgrid(np.arange(0, shape[1], step),
+                                                    np.arange(0, shape[0], step))
+        return grid
 
     def export_dialog(self):
+        if self._Z is None:
+            return   # first map still generating
         dlg = QtWidgets.QFileDialog(self, 'Export', os.path.abspath('exports'))
         dlg.setAcceptMode(QtWidgets.QFileDialog.AcceptSave)
         dlg.setNameFilters(['PNG image (*.png)', 'OBJ mesh (*.obj)'])
@@ -318,25 +633,20 @@ class FractalWorkbench(QtWidgets.QMainWindow):
         png = base + '.png'
         obj = base + '.obj'
 
-        self.fig.subplots_adjust(wspace=0.35)
+        saved = [png, obj]
+
+        if self._gl_view is not None:
+            surface_png = base + '_surface.png'
+            self._gl_view.grabFramebuffer().save(surface_png)
+            saved.insert(1, surface_png)
+        else:
+            self.fig.subplots_adjust(wspace=0.35)
         self.fig.savefig(png, dpi=300)
 
-        Z = self._Z
-        h, w = Z.shape
-        with open(obj, 'w') as f:
-            for i in range(h):
-                for j in range(w):
-                    f.write(f"v {j} {i} {Z[i,j]:.4f}\n")
-            for i in range(h-1):
-                for j in range(w-1):
-                    v1 = i*w + j + 1
-                    v2 = v1 + 1
-                    v3 = v1 + w
-                    v4 = v3 + 1
-                    f.write(f"f {v1} {v2} {v4} {v3}\n")
+        _write_obj(obj, self._Z)
 
         QtWidgets.QMessageBox.information(
-            self, 'Saved', f'Saved to:\n• {png}\n• {obj}'
+            self, 'Saved', 'Saved to:\n' + '\n'.join(f'• {f}' for f in saved)
         )
 
     def _install_rotation_lock(self) -> None:
@@ -2,8 +2,9 @@
 
 import numpy as np
 import warnings
-from scipy.ndimage import gaussian_filter
+from numba import njit, prange
 
+from ._parallel import serialized
 from .post_processing import thermal_erosion, hydraulic_erosion, voronoi_cliffs
 
 
@@ -13,16 +14,112 @@ def _next_pow2_plus1(n: int) -> int:
     return 2**k + 1
 
 
+@serialized
+@njit(parallel=True, fastmath=True)
+def _diamond_step(grid, step, scale, rand):
+    """
+    Diamond step at one scale: set every cell centre to the mean of its
+    four corners plus noise. Centres are independent, so rows run in parallel.
+    rand: uniform [0,1) draws, one per centre in row-major order
+    """
+    n = grid.shape[0]
+    half = step // 2
+    cells = (n - 1) // step
+    for a in prange(cells):
+        x = a * step
+        for b in range(cells):
+            y = b * step
+            avg = (
+                grid[x, y]
+                + grid[x + step, y]
+                + grid[x, y + step]
+                + grid[x + step, y + step]
+            ) * 0.25
+            grid[x + half, y + half] = avg + (rand[a * cells + b] - 0.5) * scale
+
+
+@serialized
+@njit(parallel=True, fastmath=True)
+def _square_step(grid, step, scale, rand):
+    """
+    Square step at one scale: set every edge midpoint to the mean of its
+    (up to four) in-bounds neighbours plus noise. Midpoints only read corners
+    and diamond centres, so rows run in parallel.
+    rand: uniform [0,1) draws, one per midpoint in row-major order
+    """
+    n = grid.shape[0]
+    half = step // 2
+    cells = (n - 1) // step
+    for r in prange(2 * cells + 1):
+        x = r * half
+        # even rows hold `cells` midpoints starting at `half`, odd rows `cells+1` from 0
+        k = (r + 1) // 2 * cells + r // 2 * (cells + 1)
+        for y in range((x + half) % step, n, step):
+            total = 0.0
+            count = 0
+            if x - half >= 0:
+                total += grid[x - half, y]
+                count += 1
+            if x + half < n:
+                total += grid[x + half, y]
+                count += 1
+            if y - half >= 0:
+                total += grid[x, y - half]
+                count += 1
+            if y + half < n:
+                total += grid[x, y + half]
+                count += 1
+            grid[x, y] = total / count + (rand[k] - 0.5) * scale
+            k += 1
+
+
+# x, y of Perlin's 16 gradient directions, picked by the low 4 bits of a lattice hash
+_GRAD_X = np.array([1, -1, 1, -1, 1, -1, 1, -1, 0, 0, 0, 0, 1, 0, -1, 0], dtype=np.float32)
+_GRAD_Y = np.array([1, 1, -1, -1, 0, 0, 0, 0, 1, -1, 1, -1, 1, -1, 1, -1], dtype=np.float32)
+
+
+def _perlin_grid(x, y, perm):
+    """
+    Classic 2D Perlin noise on the grid x (rows) by y (columns), as float32.
+    x, y: 1D sample coordinates
+    perm: a permutation of 0..255, repeated once (512 entries)
+    """
+    xf, yf = np.floor(x), np.floor(y)
+    xi = xf.astype(np.intp) & 255
+    yi = yf.astype(np.intp) & 255
+    fx = (x - xf).astype(np.float32)[:, None]
+    fy = (y - yf).astype(np.float32)[None, :]
+    u = fx * fx * fx * (fx * (fx * 6 - 15) + 10)
+    v = fy * fy * fy * (fy * (fy * 6 - 15) + 10)
+
+    a = perm[xi][:, None]
+    b = perm[xi + 1][:, None]
+
+    def corner(h, dx, dy):
+        h = perm[h] & 15
+        return _GRAD_X[h] * dx + _GRAD_Y[h] * dy
+
+    fx1, fy1 = fx - 1, fy - 1
+    n00 = corner(perm[a + yi], fx, fy)
+    n10 = corner(perm[b + yi], fx1, fy)
+    n01 = corner(perm[a + yi + 1], fx, fy1)
+    n11 = corner(perm[b + yi + 1], fx1, fy1)
+    n0 = n00 + u * (n10 - n00)
+    n1 = n01 + u * (n11 - n01)
+    return n0 + v * (n1 - n0)
+
+
 class HeightMapGenerator:
     """
     Base class for height map generators.
     Subclasses must implement generate() returning a 2D numpy array in [0,1].
+    Randomness comes from ``self.rng``, a per-instance ``numpy.random.Generator``
+    (lock-free, so generators on different threads don't contend or interfere).
     """
     def __init__(self, seed: int | None = None, size: int = 257):
         self.seed = seed
         self.size = size
-        if seed is not None:
-            np.random.seed(seed)
+        self.rng = np.random.default_rng(seed)
 
     def generate(self, **params) -> np.ndarray:
         raise NotImplementedError("Subclasses must implement generate().")
@@ -45,44 +142,24 @@ class DiamondSquareGenerator(HeightMapGenerator):
 
         grid = np.zeros((n, n), dtype=np.float32)
         # initialize corners
-        grid[0, 0] = np.random.rand()
-        grid[0, -1] = np.random.rand()
-        grid[-1, 0] = np.random.rand()
-        grid[-1, -1] = np.random.rand()
+        grid[0, 0], grid[0, -1], grid[-1, 0], grid[-1, -1] = self.rng.random(4)
 
+        # draw every perturbation up front, in the order the loops consume them
+        steps = []
         step_size = n - 1
-        scale = roughness
-
         while step_size > 1:
-            half = step_size // 2
-
-            # Diamond step
-            for x in range(0, n - 1, step_size):
-                for y in range(0, n - 1, step_size):
-                    avg = (
-                        grid[x, y]
-                        + grid[x + step_size, y]
-                        + grid[x, y + step_size]
-                        + grid[x + step_size, y + step_size]
-                    ) * 0.25
-                    grid[x + half, y + half] = avg + (np.random.rand() - 0.5) * scale
-
-            # Square step
-            for x in range(0, n, half):
-                for y in range((x + half) % step_size, n, step_size):
-                    vals = []
-                    if x - half >= 0:
-                        vals.append(grid[x - half, y])
-                    if x + half < n:
-                        vals.append(grid[x + half, y])
-                    if y - half >= 0:
-                        vals.append(grid[x, y - half])
-                    if y + half < n:
-                        vals.append(grid[x, y + half])
-                    avg = np.mean(vals)
-                    grid[x, y] = avg + (np.random.rand() - 0.5) * scale
-
-            step_size = half
+            cells = (n - 1) // step_size
+            steps.append((step_size, cells * cells, 2 * cells * (cells + 1)))
+            step_size //= 2
+        rand = self.rng.random(sum(d + s for _, d, s in steps))
+
+        scale = roughness
+        offset = 0
+        for step_size, n_diamond, n_square in steps:
+            _diamond_step(grid, step_size, scale, rand[offset:offset + n_diamond])
+            offset += n_diamond
+            _square_step(grid, step_size, scale, rand[offset:offset + n_square])
+            offset += n_square
             scale *= 0.5  # fixed amplitude decay
 
         # normalize to [0,1]
@@ -93,20 +170,14 @@ class DiamondSquareGenerator(HeightMapGenerator):
 
 class FBMGenerator(HeightMapGenerator):
     """
-    Fractal Brownian Motion using Perlin noise or fallback smooth noise.
+    Fractal Brownian Motion over Perlin noise, evaluated on the whole grid
+    per octave with NumPy. The lattice permutation is drawn from the seed.
     params:
       - octaves, persistence, lacunarity, scale
     """
     def __init__(self, seed: int | None = None, size: int = 256):
         super().__init__(seed, size)
-        try:
-            from noise import pnoise2
-            self._noise_func = pnoise2
-            self._use_perlin = True
-        except ImportError:
-            arr = np.random.rand(self.size, self.size).astype(np.float32)
-            self._base_noise = gaussian_filter(arr, sigma=self.size / 8)
-            self._use_perlin = False
+        self._perm = np.tile(self.rng.permutation(256), 2)
 
     def generate(
         self,
@@ -115,32 +186,14 @@ class FBMGenerator(HeightMapGenerator):
         lacunarity: float = 2.0,
         scale: float = 50.0
     ) -> np.ndarray:
-        shape = (self.size, self.size)
-        heightmap = np.zeros(shape, dtype=np.float32)
-
-        if not self._use_perlin:
-            xv = np.linspace(0, self.size - 1, shape[1])
-            yv = np.linspace(0, self.size - 1, shape[0])
-            tmp = np.interp(xv[np.newaxis, :], np.arange(self.size), self._base_noise)
-            heightmap = np.interp(yv[:, np.newaxis], np.arange(self.size), tmp)
-        else:
-            # now pass `base=self.seed` into pnoise2 so different seeds give different noise
-            base_seed = int(self.seed) if self.seed is not None else 0
-            for i in range(shape[0]):
-                for j in range(shape[1]):
-                    x = i / scale
-                    y = j / scale
-                    amp, freq = 1.0, 1.0
-                    val = 0.0
-                    for _ in range(octaves):
-                        val += amp * self._noise_func(
-                            x * freq,
-                            y * freq,
-                            base=base_seed
-                        )
-                        amp *= persistence
-                        freq *= lacunarity
-                    heightmap[i, j] = val
+        heightmap = np.zeros((self.size, self.size), dtype=np.float32)
+        coords = np.arange(self.size) / scale
+        amp, freq = 1.0, 1.0
+        for _ in range(octaves):
+            octave = _perlin_grid(coords * freq, coords * freq, self._perm)
+            heightmap += np.float32(amp) * octave
+            amp *= persistence
+            freq *= lacunarity
 
         # normalize to [0,1]
         heightmap -= heightmap.min()
@@ -152,6 +205,7 @@ def generate_heightmap(
     algorithm: str = 'diamond-square',
     size: int = 257,
     seed: int | None = None,
+    dtype=np.float32,
     **params
 ) -> np.ndarray:
     """
@@ -160,6 +214,7 @@ def generate_heightmap(
       - thermal_iters, talus_angle
       - hydro_iters, rain_amount, solubility
       - voronoi_sites, ridge_height
+    The result is a C-contiguous array of ``dtype`` (float32 by default).
     """
     post_keys = {
         'thermal_iters', 'talus_angle',
@@ -178,24 +233,29 @@ def generate_heightmap(
 
     Z = gen.generate(**params)
 
+    # generators and every pass below return maps normalized to [0,1],
+    # so the erosion passes can skip re-normalizing their input
     if post.get('thermal_iters'):
         Z = thermal_erosion(
             Z,
             iterations=post['thermal_iters'],
-            talus_angle=post.get('talus_angle', 0.01)
+            talus_angle=post.get('talus_angle', 0.01),
+            prenormalized=True
         )
     if post.get('hydro_iters'):
         Z = hydraulic_erosion(
             Z,
             iterations=post['hydro_iters'],
             rain_amount=post.get('rain_amount', 0.01),
-            solubility=post.get('solubility', 0.1)
+            solubility=post.get('solubility', 0.1),
+            prenormalized=True
         )
     if post.get('voronoi_sites'):
         Z = voronoi_cliffs(
             Z,
             num_sites=post['voronoi_sites'],
-            ridge_height=post.get('ridge_height', 0.5)
+            ridge_height=post.get('ridge_height', 0.5),
+            rng=gen.rng
         )
 
-    return Z
+    return np.ascontiguousarray(Z, dtype=dtype)
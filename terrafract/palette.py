@@ -0,0 +1,49 @@
+# palette.py
+
+import numpy as np
+from matplotlib import colormaps
+from PIL import Image
+
+
+def colormap_lut(name: str = 'terrain', n: int = 256) -> np.ndarray:
+    """
+    Sample a Matplotlib colormap into an (n,3) uint8 RGB lookup table.
+    """
+    return (colormaps[name](np.linspace(0, 1, n))[:, :3] * 255).astype(np.uint8)
+
+
+# Default table shared by previews, exports and timelapse encoders
+TERRAIN_LUT = colormap_lut('terrain')
+
+
+def lut_indices(Z, vmin=None, vmax=None, n=256):
+    """
+    Normalize a 2D array to uint8 indices into an ``n``-entry (n <= 256) table.
+    vmin/vmax default to the data range (like ``imshow``).
+    """
+    lo = Z.min() if vmin is None else vmin
+    hi = Z.max() if vmax is None else vmax
+    span = hi - lo
+    idx = (np.clip(Z, lo, hi) - lo) * ((n - 1) / span if span > 0 else 0)
+    return idx.astype(np.uint8)
+
+
+def colorize(Z, lut=TERRAIN_LUT, vmin=None, vmax=None, out=None):
+    """
+    Map a 2D array through ``lut`` (at most 256 entries) into a
+    C-contiguous (n,m,3) uint8 image, written into ``out`` when given.
+    """
+    idx = lut_indices(Z, vmin, vmax, len(lut))
+    if out is None:
+        return np.ascontiguousarray(lut[idx])
+    return np.take(lut, idx, axis=0, out=out)
+
+
+def save_palette_png(Z, path, lut=TERRAIN_LUT, vmin=None, vmax=None):
+    """
+    Save ``Z`` as an 8-bit palette PNG whose palette is ``lut``.
+    Roughly a quarter of the size of the equivalent RGBA ``plt.imsave`` output.
+    """
+    img = Image.fromarray(lut_indices(Z, vmin, vmax, len(lut)), mode='P')
+    img.putpalette(lut.tobytes())
+    img.save(path, optimize=True)
@@ -1,49 +1,80 @@
 # post_processing.py
 
+import sys
+
 import numpy as np
-from scipy.ndimage import gaussian_filter
-from scipy.spatial import Voronoi, cKDTree
+from scipy.spatial import Voronoi
 from numba import njit, prange
 
-@njit(parallel=True)
+from ._parallel import serialized
+
+# Keep compiled kernels on disk so later runs skip the JIT stall. Frozen
+# builds ship no .py sources for Numba to key the cache on; they rely on
+# the launcher's warm-up thread instead.
+_JIT_CACHE = not getattr(sys, "frozen", False)
+
+@njit(inline='always')
+def _talus_flow(h, h2, talus_angle, send, recv):
+    """Signed material exchange of a cell at h with a neighbour at h2."""
+    slope = h - h2
+    if send and slope > talus_angle:
+        return -0.5 * (slope - talus_angle)
+    if recv and -slope > talus_angle:
+        return 0.5 * (-slope - talus_angle)
+    return 0.0
+
+
+@serialized
+@njit(parallel=True, nogil=True, cache=_JIT_CACHE)
 def _thermal_core(Z, iterations, talus_angle):
     """
     Core loop for thermal erosion, accelerated with Numba.
-    Z: 2D float64 array
+    Z: 2D float32 array, used as one of the two working buffers (overwritten)
     iterations: number of passes
     talus_angle: slope threshold
     Returns: new heightmap array
+    Each interior cell sheds half its excess slope to every lower 4-neighbour.
+    Cells gather their own outflow and their interior neighbours' inflow,
+    so rows write only themselves and run in parallel without races.
     """
     n, m = Z.shape
-    Z_out = Z.copy()
+    Z_out = Z
+    Z_next = np.empty_like(Z_out)
     for _ in range(iterations):
-        delta = np.zeros_like(Z_out)
-        for i in prange(1, n-1):
-            for j in range(1, m-1):
+        for i in prange(n):
+            row_in = 0 < i < n-1
+            for j in range(m):
                 h = Z_out[i, j]
-                # check 4 neighbors
-                for di, dj in ((1,0), (-1,0), (0,1), (0,-1)):
-                    h2 = Z_out[i+di, j+dj]
-                    slope = h - h2
-                    if slope > talus_angle:
-                        tr = 0.5 * (slope - talus_angle)
-                        delta[i, j]    -= tr
-                        delta[i+di, j+dj] += tr
-        Z_out += delta
+                col_in = 0 < j < m-1
+                inner = row_in and col_in
+                d = 0.0
+                if i > 0:
+                    d += _talus_flow(h, Z_out[i-1, j], talus_angle, inner, i > 1 and col_in)
+                if i < n-1:
+                    d += _talus_flow(h, Z_out[i+1, j], talus_angle, inner, i < n-2 and col_in)
+                if j > 0:
+                    d += _talus_flow(h, Z_out[i, j-1], talus_angle, inner, j > 1 and row_in)
+                if j < m-1:
+                    d += _talus_flow(h, Z_out[i, j+1], talus_angle, inner, j < m-2 and row_in)
+                Z_next[i, j] = h + d
+        Z_out, Z_next = Z_next, Z_out
     return Z_out
 
 
-def thermal_erosion(Z, iterations=10, talus_angle=0.01):
+def thermal_erosion(Z, iterations=10, talus_angle=0.01, prenormalized=False):
     """
     Thermal erosion with Numba-accelerated core.
     Normalizes output back to [0,1].
+    prenormalized: Z is already in [0,1] (min 0, max 1); skip normalizing the input
     """
-    Zn = Z.copy().astype(np.float64)
-    Zn -= Zn.min()
-    if Zn.max() > 0:
-        Zn /= Zn.max()
+    # the one private copy, eroded in place; float32 halves the kernel's memory traffic
+    Zn = np.array(Z, dtype=np.float32)
+    if not prenormalized:
+        Zn -= Zn.min()
+        if Zn.max() > 0:
+            Zn /= Zn.max()
     # run Numba core
-    Zt = _thermal_core(Zn, iterations, talus_angle)
+    Zt = _thermal_core(Zn, iterations, np.float32(talus_angle))
     # re-normalize
     Zt -= Zt.min()
     if Zt.max() > 0:
@@ -51,36 +82,45 @@ def thermal_erosion(Z, iterations=10, talus_angle=0.01):
     return Zt
 
 
-@njit(parallel=True)
+@serialized
+@njit(parallel=True, nogil=True, cache=_JIT_CACHE)
 def _hydro_core(Z, water, sediment, iterations, rain_amount, solubility):
     """
     Core loop for hydraulic erosion, accelerated with Numba.
-    Z: heightmap, water: water map, sediment: sediment map
-    Returns: eroded heightmap
+    Z: heightmap, water: water map, sediment: sediment map (all updated in place)
+    Returns: eroded heightmap (Z itself)
     """
     n, m = Z.shape
-    Z_out = Z.copy()
-    W = water.copy()
-    S = sediment.copy()
+    Z_out = Z
+    W = water
+    S = sediment
     for _ in range(iterations):
         W += rain_amount
         for i in prange(1, n-1):
+            # downslope neighbours of the current cell, reused along the row
+            drops = np.empty(4)
+            iis = np.empty(4, np.int64)
+            jjs = np.empty(4, np.int64)
             for j in range(1, m-1):
                 h = Z_out[i, j] + W[i, j]
                 # find downslope neighbors
                 total_drop = 0.0
-                lows = []
+                k = 0
                 for di, dj in ((1,0), (-1,0), (0,1), (0,-1)):
                     ii, jj = i+di, j+dj
                     h2 = Z_out[ii, jj] + W[ii, jj]
                     drop = h - h2
                     if drop > 0.0:
                         total_drop += drop
-                        lows.append((ii, jj, drop))
+                        drops[k] = drop
+                        iis[k] = ii
+                        jjs[k] = jj
+                        k += 1
                 if total_drop <= 0.0:
                     continue
                 # distribute flow
-                for ii, jj, drop in lows:
+                for t in range(k):
+                    ii, jj, drop = iis[t], jjs[t], drops[t]
                     frac = drop / total_drop
                     flow = W[i, j] * frac
                     W[i, j]   -= flow
@@ -91,15 +131,20 @@ def _hydro_core(Z, water, sediment, iterations, rain_amount, solubility):
     return Z_out
 
 
-def hydraulic_erosion(Z, iterations=50, rain_amount=0.01, solubility=0.1):
+def hydraulic_erosion(Z, iterations=50, rain_amount=0.01, solubility=0.1,
+                      prenormalized=False):
     """
     Hydraulic erosion with Numba-accelerated core.
     Normalizes output back to [0,1].
+    prenormalized: Z is already in [0,1] (min 0, max 1); skip normalizing the input
     """
-    Zn = Z.copy().astype(np.float64)
-    Zn -= Zn.min()
-    if Zn.max() > 0:
-        Zn /= Zn.max()
+    # the one private copy, eroded in place; stays float64 since the flow
+    # routing is latency-bound and float32 ran ~1.5x slower
+    Zn = np.array(Z, dtype=np.float64)
+    if not prenormalized:
+        Zn -= Zn.min()
+        if Zn.max() > 0:
+            Zn /= Zn.max()
     # initialize water & sediment maps
     water = np.zeros_like(Zn)
     sediment = np.zeros_like(Zn)
@@ -110,25 +155,54 @@ def hydraulic_erosion(Z, iterations=50, rain_amount=0.01, solubility=0.1):
     return Zh
 
 
-def voronoi_cliffs(Z, num_sites=10, ridge_height=0.5):
+@serialized
+@njit(parallel=True, nogil=True, cache=_JIT_CACHE)
+def _nearest_sq_dist_nb(n, m, pts):
+    """
+    Squared distance from every cell (i, j) of an n x m grid to the nearest
+    of pts (k, 2). Row and column offsets are squared once, so each cell
+    only adds and compares.
+    """
+    k = pts.shape[0]
+    dy2 = np.empty((n, k))
+    dx2 = np.empty((m, k))
+    for i in range(n):
+        for v in range(k):
+            dy2[i, v] = (i - pts[v, 0]) ** 2
+    for j in range(m):
+        for v in range(k):
+            dx2[j, v] = (j - pts[v, 1]) ** 2
+    out = np.empty((n, m))
+    for i in prange(n):
+        for j in range(m):
+            best = np.inf
+            for v in range(k):
+                d = dy2[i, v] + dx2[j, v]
+                if d < best:
+                    best = d
+            out[i, j] = best
+    return out
+
+
+def voronoi_cliffs(Z, num_sites=10, ridge_height=0.5, rng=None):
     """
-    Voronoi-based cliff formation (unchanged).
+    Voronoi-based cliff formation.
+    rng: numpy Generator or seed for the site positions (fresh entropy if None)
     """
+    rng = np.random.default_rng(rng)
     n, m = Z.shape
     pts = np.column_stack(
         (
-            np.random.uniform(0, n, size=num_sites),
-            np.random.uniform(0, m, size=num_sites)
+            rng.uniform(0, n, size=num_sites),
+            rng.uniform(0, m, size=num_sites)
         )
     )
     vor = Voronoi(pts)
-    grid_pts = np.indices((n, m)).transpose(1, 2, 0).reshape(-1, 2)
-    ridge_pts = vor.vertices
-    tree = cKDTree(ridge_pts)
-    dists, _ = tree.query(grid_pts)
-    dist_map = dists.reshape(n, m)
+    # cliffs rise around the Voronoi vertices; a handful of points, so the
+    # per-cell nearest distance is a direct scan rather than a KD-tree query
+    dist_sq = _nearest_sq_dist_nb(n, m, vor.vertices)
     with np.errstate(divide='ignore'):
-        influence = np.exp(-(dist_map**2) / (2 * (n/num_sites)**2))
+        influence = np.exp(-dist_sq / (2 * (n/num_sites)**2))
     Z2 = Z + ridge_height * influence
     Z2 -= Z2.min()
     if Z2.max() > 0:
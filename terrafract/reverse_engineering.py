@@ -2,7 +2,6 @@
 
 import numpy as np
 from scipy import fftpack
-from sklearn.linear_model import LinearRegression
 
 from spectral import radial_power_spectrum
 
@@ -14,10 +13,8 @@ def estimate_spectral_exponent(Z, fit_range=None):
     mask = (freqs >= fmin) & (freqs <= fmax)
     log_f = np.log(freqs[mask])
     log_p = np.log(power[mask])
-    model = LinearRegression()
-    model.fit(log_f.reshape(-1,1), log_p)
-    beta = model.coef_[0]
-    return beta, model.intercept_
+    beta, intercept = np.polyfit(log_f, log_p, 1)
+    return beta, intercept
 
 def translate_beta_to_H(beta):
     return (beta - 2) / 2
@@ -1,43 +1,70 @@
 # spectral.py
 
+from functools import lru_cache
+
 import numpy as np
-from scipy import fftpack
+from numba import njit, prange, get_num_threads
+
+from ._parallel import serialized
+
+
+@lru_cache(maxsize=8)
+def _ring_map(n: int, m: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Integer-radius ring of every rfft2 half-plane cell of an (n, m) map,
+    as uint16, the per-column weights, and the weighted cell count per ring.
+    Columns that stand in for a conjugate pair (all but DC and, for even m,
+    Nyquist) count twice, so the rings match those of the full fftshifted
+    spectrum.
+    """
+    half = m // 2 + 1
+    ky = np.minimum(np.arange(n), n - np.arange(n))
+    kx = np.arange(half)
+    r = np.sqrt(ky[:, None] ** 2 + kx[None, :] ** 2).astype(np.uint16)
+    w = np.full(half, 2.0)
+    w[0] = 1.0
+    if m % 2 == 0:
+        w[-1] = 1.0
+    nbins = int(np.sqrt((m // 2) ** 2 + (n // 2) ** 2)) + 1
+    counts = np.bincount(r.ravel(), np.broadcast_to(w, r.shape).ravel(), nbins)
+    return r, w, counts
 
-# Cache radial bin indices per shape to speed repeated calls
-_radial_cache: dict[tuple[int,int], dict[int,np.ndarray]] = {}
 
-def radial_power_spectrum(Z: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+@serialized
+@njit(parallel=True)
+def _ring_sums_nb(P, r, w, nbins, n_chunks):
+    """
+    Weighted power summed over the rings of _ring_map, in one pass.
+    Rows are split into n_chunks, each with its own bins, summed at the end.
+    """
+    n, half = P.shape
+    tbin = np.zeros((n_chunks, nbins))
+    rows = (n + n_chunks - 1) // n_chunks
+    for c in prange(n_chunks):
+        for i in range(c * rows, min((c + 1) * rows, n)):
+            for j in range(half):
+                tbin[c, r[i, j]] += w[j] * P[i, j]
+    return tbin.sum(axis=0)
+
+
+def radial_power_spectrum(Z: np.ndarray, dtype=np.float64) -> tuple[np.ndarray, np.ndarray]:
     """
     Compute the radial (isotropic) power spectrum of a 2D array.
 
+    Z is real, so only the rfft2 half-plane is transformed; the ring
+    geometry is cached per shape. ``dtype`` sets the FFT precision
+    (float32 for interactive previews); ring sums accumulate in float64.
+
     Returns
     -------
     freqs : 1D array of radial frequencies (skipping zero)
     power : 1D array of averaged spectral power at each frequency
     """
-    ny, nx = Z.shape
-    key = (ny, nx)
-    if key not in _radial_cache:
-        cy, cx = ny // 2, nx // 2
-        y, x = np.indices((ny, nx))
-        r = np.hypot(x - cx, y - cy).astype(int)
-        # map each radius to flat indices array
-        tbin_idx = {ri: np.where(r.ravel() == ri)[0] for ri in np.unique(r)}
-        _radial_cache[key] = tbin_idx
-    else:
-        tbin_idx = _radial_cache[key]
-
-    # 2D FFT → shifted power
-    F = fftpack.fftshift(fftpack.fft2(Z))
-    P = np.abs(F)**2
-    flatP = P.ravel()
-
-    freqs = []
-    power = []
-    for ri, idxs in sorted(tbin_idx.items()):
-        if ri == 0:  # skip the DC term
-            continue
-        freqs.append(ri)
-        power.append(flatP[idxs].mean())
-
-    return np.array(freqs), np.array(power)
+    F = np.fft.rfft2(np.asarray(Z, dtype=dtype))
+    P = F.real * F.real + F.imag * F.imag
+    r, w, counts = _ring_map(*Z.shape)
+    tbin = _ring_sums_nb(P, r, w, len(counts), get_num_threads())
+
+    # every radius that has cells, skipping the DC term
+    freqs = np.flatnonzero(counts[1:]) + 1
+    return freqs, tbin[freqs] / counts[freqs]
@@ -1,15 +1,12 @@
-import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from .post_processing import thermal_erosion, hydraulic_erosion
-
-# For river extraction and shapefile export
-import shapely.geometry as geom
-import geopandas as gpd
+from concurrent.futures import ThreadPoolExecutor
 
-import matplotlib
-matplotlib.use('Agg')
+import numpy as np
+from numba import njit, prange
 
+from ._parallel import serialized
+from .palette import colorize
+from .post_processing import _JIT_CACHE, thermal_erosion, hydraulic_erosion
+from .video import ffmpeg_rgb_writer
 
 # For VR (stub)
 try:
@@ -17,13 +14,14 @@ try:
 except ImportError:
     xr = None  # VR support requires pyopenxr
 
-# For multiplayer sandbox
+# For multiplayer sandbox; shapely, geopandas and websockets are imported
+# by the functions that need them, keeping them off the import path
 import asyncio
-import websockets
 
 
 def create_erosion_timelapse(Z_init, steps=100, therm_iters=1, hydro_iters=1, interval=100,
-                             output_path='erosion_timelapse.mp4'):
+                             output_path='erosion_timelapse.mp4', progress_cb=None,
+                             cancel_cb=None):
     """
     Generate a time-lapse movie of terrain evolving under thermal and hydraulic erosion.
 
@@ -32,28 +30,103 @@ def create_erosion_timelapse(Z_init, steps=100, therm_iters=1, hydro_iters=1, in
     therm_iters/hydro_iters: erosion iterations per frame
     interval: ms between frames in the animation
     output_path: path to save the MP4 video
-    """
-    fig, ax = plt.subplots()
-    im = ax.imshow(Z_init, cmap='terrain', vmin=0, vmax=1)
-    plt.axis('off')
+    progress_cb: optional callable(done, steps) invoked after each frame
+    cancel_cb: optional callable() polled before each frame; returning True
+               stops early and finalizes the frames written so far
 
+    Frames are colour-mapped with the terrain LUT and piped to ffmpeg as
+    raw RGB, one pixel per heightmap cell. Colour-mapping and writing a
+    frame run on a single background thread, overlapping the erosion of
+    the next one; at most one frame is in flight.
+    """
     Z = Z_init.copy()
-    
-    def update(frame):
-        nonlocal Z
-        if therm_iters > 0:
-            Z = thermal_erosion(Z, iterations=therm_iters, talus_angle=0.01)
-        if hydro_iters > 0:
-            Z = hydraulic_erosion(Z, iterations=hydro_iters, rain_amount=0.01)
-        im.set_data(Z)
-        return [im]
-
-    anim = animation.FuncAnimation(fig, update, frames=steps, interval=interval, blit=True)
-    anim.save(output_path, dpi=200, fps=1000 // interval)
-    plt.close(fig)
+    h, w = Z.shape
+    frame = np.empty((h, w, 3), dtype=np.uint8)   # reused for every frame
+
+    with ffmpeg_rgb_writer(output_path, w, h, fps=1000 // interval) as pipe:
+        def emit(Z):
+            pipe.write(colorize(Z, vmin=0, vmax=1, out=frame).data)
+
+        pending = None
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='timelapse-enc') as pool:
+            for i in range(steps):
+                if cancel_cb and cancel_cb():
+                    break
+                # erosion returns fresh arrays, so the queued frame is never mutated
+                if therm_iters > 0:
+                    Z = thermal_erosion(Z, iterations=therm_iters, talus_angle=0.01)
+                if hydro_iters > 0:
+                    Z = hydraulic_erosion(Z, iterations=hydro_iters, rain_amount=0.01)
+                if pending is not None:
+                    pending.result()
+                pending = pool.submit(emit, Z)
+                if progress_cb:
+                    progress_cb(i + 1, steps)
+            if pending is not None:
+                pending.result()
     print(f"Saved erosion time-lapse to {output_path}")
 
 
+# D8 neighbour offsets, in the order ties between equally low neighbours are broken
+_D8 = ((-1,0), (1,0), (0,-1), (0,1), (-1,-1), (-1,1), (1,-1), (1,1))
+
+
+@serialized
+@njit(parallel=True, nogil=True, cache=_JIT_CACHE)
+def _d8_edges_nb(Z):
+    """
+    Flat index of each cell's lowest strictly-lower 8-neighbour (D8 steepest
+    descent); pits and flats point at themselves. Rows run in parallel, each
+    writing only its own slice of the result.
+    """
+    ny, nx = Z.shape
+    edges = np.empty(ny * nx, np.int64)
+    for i in prange(ny):
+        for j in range(nx):
+            best = i*nx + j
+            min_h = Z[i, j]
+            for di, dj in _D8:
+                ii, jj = i + di, j + dj
+                if 0 <= ii < ny and 0 <= jj < nx and Z[ii, jj] < min_h:
+                    min_h = Z[ii, jj]
+                    best = ii*nx + jj
+            edges[i*nx + j] = best
+    return edges
+
+
+@njit(nogil=True, cache=_JIT_CACHE)
+def _flow_accumulation_nb(edges):
+    """
+    Upstream cell count (itself included) of every cell of the D8 graph
+    ``edges``: Kahn's topological order over an index queue, so each cell
+    forwards its total once all of its inflows have arrived.
+    """
+    n = edges.size
+    acc = np.ones(n)
+    indeg = np.zeros(n, np.int32)
+    for p in range(n):
+        if edges[p] != p:
+            indeg[edges[p]] += 1
+    queue = np.empty(n, np.int64)
+    tail = 0
+    for p in range(n):
+        if indeg[p] == 0:
+            queue[tail] = p
+            tail += 1
+    head = 0
+    while head < tail:
+        p = queue[head]
+        head += 1
+        q = edges[p]
+        if q != p:
+            acc[q] += acc[p]
+            indeg[q] -= 1
+            if indeg[q] == 0:
+                queue[tail] = q
+                tail += 1
+    return acc
+
+
 def generate_river_network(Z, threshold=100, smooth_factor=5):
     """
     Procedural river extraction via flow accumulation.
@@ -64,67 +137,41 @@ def generate_river_network(Z, threshold=100, smooth_factor=5):
 
     Returns a list of shapely LineString objects.
     """
-    # Simple D8 flow directions
-    ny, nx = Z.shape
-    # Compute slope to neighbors
-    acc = np.ones_like(Z)
-    # Iteratively accumulate flow
-    for i in range(ny):
-        for j in range(nx):
-            # find lowest neighbor
-            min_h = Z[i,j]
-            dir = None
-            for di, dj in [(-1,0),(1,0),(0,-1),(0,1),(-1,-1),(-1,1),(1,-1),(1,1)]:
-                ii, jj = i+di, j+dj
-                if 0 <= ii < ny and 0 <= jj < nx and Z[ii,jj] < min_h:
-                    min_h = Z[ii,jj]
-                    dir = (ii, jj)
-            if dir:
-                acc[dir] += acc[i,j]
-
-    # Identify river pixels
-    river_mask = acc > threshold
+    import shapely.geometry as geom
+    nx = Z.shape[1]
+    edges = _d8_edges_nb(Z)
+    acc = _flow_accumulation_nb(edges)
+
+    # Identify river pixels; all tracing state is flat, indexed like edges
+    river = acc > threshold
     # Extract connected river segments (simple approach: trace lines)
     rivers = []
-    visited = np.zeros_like(river_mask)
-    for i in range(ny):
-        for j in range(nx):
-            if river_mask[i,j] and not visited[i,j]:
-                # Trace downstream
-                coords = []
-                ci, cj = i, j
-                while True:
-                    coords.append((cj, ci))
-                    visited[ci, cj] = True
-                    # find next
-                    min_h = Z[ci,cj]
-                    nxt = None
-                    for di, dj in [(-1,0),(1,0),(0,-1),(0,1),(-1,-1),(-1,1),(1,-1),(1,1)]:
-                        ii, jj = ci+di, cj+dj
-                        if 0 <= ii < ny and 0 <= jj < nx and Z[ii,jj] < min_h:
-                            min_h = Z[ii,jj]
-                            nxt = (ii, jj)
-                    if nxt and river_mask[nxt]:
-                        ci, cj = nxt
-                        if visited[ci, cj]:
-                            break
-                    else:
-                        break
-                if len(coords) > 1:
-                    rivers.append(geom.LineString(coords))
+    visited = np.zeros_like(river)
+    for p in np.flatnonzero(river):
+        # Trace downstream along the D8 edges until a pit, the end of the
+        # channel or an already traced cell
+        coords = []
+        while not visited[p]:
+            coords.append((p % nx, p // nx))
+            visited[p] = True
+            nxt = edges[p]
+            if nxt == p or not river[nxt]:
+                break
+            p = nxt
+        if len(coords) > 1:
+            rivers.append(geom.LineString(coords))
     # Smooth with Chaikin's corner cutting (approximate Bézier)
-    def chaikin(coords):
-        new = []
-        for a,b in zip(coords[:-1], coords[1:]):
-            new.append((0.75*a[0] + 0.25*b[0], 0.75*a[1] + 0.25*b[1]))
-            new.append((0.25*a[0] + 0.75*b[0], 0.25*a[1] + 0.75*b[1]))
-        return new
+    def chaikin(P):
+        out = np.empty((2*len(P) - 2, 2))
+        out[0::2] = 0.75*P[:-1] + 0.25*P[1:]
+        out[1::2] = 0.25*P[:-1] + 0.75*P[1:]
+        return out
     smooth_rivers = []
     for line in rivers:
-        coords = list(line.coords)
+        P = np.asarray(line.coords)
         for _ in range(smooth_factor):
-            coords = chaikin(coords)
-        smooth_rivers.append(geom.LineString(coords))
+            P = chaikin(P)
+        smooth_rivers.append(geom.LineString(P))
 
     return smooth_rivers
 
@@ -133,6 +180,7 @@ def export_rivers_shapefile(rivers, filename='rivers.shp'):
     """
     Export a list of shapely LineString objects as a Shapefile.
     """
+    import geopandas as gpd
     gdf = gpd.GeoDataFrame(geometry=rivers, crs="EPSG:4326")
     gdf.to_file(filename)
     print(f"Exported {len(rivers)} rivers to {filename}")
@@ -149,38 +197,94 @@ def run_vr_walkthrough(Z):
     print("Starting VR walkthrough (stub)...")
 
 
-async def handle_terraforming(websocket, path, Z, bump_radius=5, bump_height=0.1):
+def _patch_message(Z, y0, y1, x0, x1):
+    """
+    Binary frame carrying Z[y0:y1, x0:x1]: four little-endian int32s
+    (x0, y0, x1, y1) followed by the patch as row-major little-endian float16.
+    """
+    header = np.array([x0, y0, x1, y1], dtype='<i4')
+    return header.tobytes() + Z[y0:y1, x0:x1].astype('<f2').tobytes()
+
+
+async def _client_sender(websocket, queue):
+    """Forward one client's queued broadcasts to it, in order."""
+    import websockets
+    try:
+        while True:
+            await websocket.send(await queue.get())
+    except websockets.ConnectionClosed:
+        pass
+
+
+def _enqueue(queue, payload, Z):
+    """Queue payload for a client without waiting on it."""
+    try:
+        queue.put_nowait(payload)
+    except asyncio.QueueFull:
+        # the client fell behind: drop its backlog and resync it with the full map
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(_patch_message(Z, 0, Z.shape[0], 0, Z.shape[1]))
+
+
+async def handle_terraforming(websocket, path, Z, bump_radius=5, bump_height=0.1,
+                              clients=None):
     """
     WebSocket handler for multiplayer terraforming sandbox.
     Clients send JSON {x, y} to raise terrain.
-    Broadcast updated heightmap to all clients.
+    New clients get the full heightmap, then every edit is broadcast as
+    the patch it changed (see _patch_message).
+    clients: dict of websocket -> send queue shared by all connections
     """
     import json
-    clients = set()
-    clients.add(websocket)
+    if clients is None:
+        clients = {}
+    queue = asyncio.Queue(maxsize=8)
+    clients[websocket] = queue
+    sender = asyncio.create_task(_client_sender(websocket, queue))
+    rows = np.arange(Z.shape[0])
+    cols = np.arange(Z.shape[1])
+    # the bump is negligible (< 1.2% of its peak) beyond 3 radii
+    reach = int(3*bump_radius) + 1
     try:
+        queue.put_nowait(_patch_message(Z, 0, Z.shape[0], 0, Z.shape[1]))
         async for message in websocket:
             data = json.loads(message)
             x, y = data['x'], data['y']
-            # apply Gaussian bump
-            xx, yy = np.meshgrid(np.arange(Z.shape[1]), np.arange(Z.shape[0]))
-            dist2 = (xx - x)**2 + (yy - y)**2
-            bump = bump_height * np.exp(-dist2/(2*bump_radius**2))
-            Z += bump
-            Z = np.clip(Z, 0, 1)
-            # broadcast new Z to clients
-            payload = json.dumps({'heightmap': Z.tolist()})
-            await asyncio.wait([c.send(payload) for c in clients])
+            # apply Gaussian bump over the window it actually covers, as the
+            # outer product of its separable row and column factors
+            y0, y1 = np.clip([int(y) - reach, int(y) + reach + 1], 0, Z.shape[0])
+            x0, x1 = np.clip([int(x) - reach, int(x) + reach + 1], 0, Z.shape[1])
+            gy = bump_height * np.exp(-(rows[y0:y1] - y)**2 / (2*bump_radius**2))
+            gx = np.exp(-(cols[x0:x1] - x)**2 / (2*bump_radius**2))
+            patch = Z[y0:y1, x0:x1]
+            patch += gy[:, None] * gx[None, :]
+            np.clip(patch, 0, 1, out=patch)
+            # hand the changed patch to every client's sender; slow clients
+            # cannot stall this loop or each other
+            payload = _patch_message(Z, y0, y1, x0, x1)
+            for q in clients.values():
+                _enqueue(q, payload, Z)
     finally:
-        clients.remove(websocket)
+        del clients[websocket]
+        sender.cancel()
+
+
+async def _serve_sandbox(Z, host, port):
+    """Serve the terraforming sandbox until cancelled."""
+    import websockets
+    clients = {}
+    # older websockets releases pass the request path as a second argument
+    async with websockets.serve(
+            lambda ws, path=None: handle_terraforming(ws, path, Z, clients=clients),
+            host, port):
+        print(f"Multiplayer sandbox running on ws://{host}:{port}")
+        await asyncio.Future()
 
 
 def start_multiplayer_sandbox(Z, host='localhost', port=8765):
     """
     Launch the multiplayer terraforming sandbox WebSocket server.
+    Blocks until interrupted.
     """
-    loop = asyncio.get_event_loop()
-    server = websockets.serve(lambda ws, path: handle_terraforming(ws, path, Z), host, port)
-    loop.run_until_complete(server)
-    print(f"Multiplayer sandbox running on ws://{host}:{port}")
-    loop.run_forever()
\ No newline at end of file
+    asyncio.run(_serve_sandbox(Z, host, port))
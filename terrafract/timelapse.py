@@ -2,8 +2,18 @@ import argparse, os
 import numpy as np
 import matplotlib.pyplot as plt
 from tqdm import tqdm
-from matplotlib.animation import FuncAnimation, PillowWriter, FFMpegWriter
+from matplotlib.animation import PillowWriter, FFMpegWriter
+from .palette import colorize, save_palette_png
 from .post_processing import thermal_erosion, hydraulic_erosion
+from .video import ffmpeg_rgb_writer
+
+def _erosion_frames(Z, steps, therm_iters, hydro_iters):
+    """Yield the heightmap after each of ``steps`` erosion steps."""
+    for _ in tqdm(range(steps), desc="Erosion frames"):
+        if therm_iters>0: Z = thermal_erosion(Z,iterations=therm_iters,talus_angle=0.01)
+        if hydro_iters>0: Z = hydraulic_erosion(Z,iterations=hydro_iters,rain_amount=0.01)
+        yield Z
+
 
 def create_erosion_timelapse(
     Z_init, steps=100,
@@ -14,35 +24,46 @@ def create_erosion_timelapse(
     """
     Generates a time-lapse of erosion.
     fmt: 'mp4'|'gif'|'frames'
+    Frames and movies without the step overlay are colour-mapped here (PNG
+    frames as palette images, movies piped to ffmpeg as raw RGB), one pixel
+    per cell; GIFs and overlaid movies render a figure.
     """
     os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
-    fig, ax = plt.subplots()
-    im = ax.imshow(Z_init, cmap='terrain', vmin=0, vmax=1)
-    ax.axis('off')
+    frames = _erosion_frames(Z_init.copy(), steps, therm_iters, hydro_iters)
 
-    Z = Z_init.copy()
-    records = []
+    if fmt=='frames':
+        # no figure needed: each frame is written as a palette PNG
+        for i, Z in enumerate(frames):
+            save_palette_png(Z, f"{output_path}_frame{i:03d}.png")
+        print(f"Saved timelapse → {output_path}")
+        return
 
-    for i in tqdm(range(steps), desc="Erosion frames"):
-        if therm_iters>0: Z = thermal_erosion(Z,iterations=therm_iters,talus_angle=0.01)
-        if hydro_iters>0: Z = hydraulic_erosion(Z,iterations=hydro_iters,rain_amount=0.01)
-        frame = Z.copy()
-        if overlay:
-            ax.text(0.02,0.95,f"Step {i+1}/{steps}",color='white',transform=ax.transAxes,fontsize=8)
-        records.append(frame)
+    if fmt!='gif' and not overlay:
+        h, w = Z_init.shape
+        rgb = np.empty((h, w, 3), dtype=np.uint8)   # reused for every frame
+        with ffmpeg_rgb_writer(output_path, w, h, fps) as pipe:
+            for Z in frames:
+                pipe.write(colorize(Z, vmin=0, vmax=1, out=rgb).data)
+        print(f"Saved timelapse → {output_path}")
+        return
 
-    def update(frame): im.set_data(frame); return [im]
-    anim = FuncAnimation(fig, update, frames=records, blit=True)
+    # frames are shown pre-coloured through the terrain LUT, so matplotlib
+    # skips its per-frame normalize + colormap pass
+    rgb = colorize(Z_init, vmin=0, vmax=1)
+    fig, ax = plt.subplots()
+    im = ax.imshow(rgb)
+    ax.axis('off')
+    label = ax.text(0.02,0.95,"",color='white',transform=ax.transAxes,fontsize=8)
+    writer = PillowWriter(fps=fps) if fmt=='gif' else FFMpegWriter(fps=fps)
 
-    if fmt=='gif':
-        writer = PillowWriter(fps=fps)
-        anim.save(output_path, writer=writer)
-    elif fmt=='frames':
-        for idx,fr in enumerate(records):
-            plt.imsave(f"{output_path}_frame{idx:03d}.png", fr, cmap='terrain')
-    else:
-        writer = FFMpegWriter(fps=fps)
-        anim.save(output_path, writer=writer)
+    # each frame goes to the writer as soon as it is eroded, so only the
+    # current heightmap is ever held, not the whole series
+    with writer.saving(fig, output_path, fig.dpi):
+        for i, Z in enumerate(frames):
+            im.set_data(colorize(Z, vmin=0, vmax=1, out=rgb))
+            if overlay:
+                label.set_text(f"Step {i+1}/{steps}")
+            writer.grab_frame()
     plt.close(fig)
     print(f"Saved timelapse → {output_path}")
 
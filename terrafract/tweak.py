@@ -4,6 +4,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from tqdm import tqdm
 from .heightmap_generators import generate_heightmap
+from .spectral import radial_power_spectrum
 from .biome_texture import (compute_slope, compute_wetness,
                              assign_biomes, biome_colormap)
 
@@ -67,11 +68,15 @@ if __name__ == '__main__':
     seeds = args.batch_seeds if args.batch_seeds else [params.get('seed',42)]
     out_dir = Path('tweak_outputs'); out_dir.mkdir(exist_ok=True)
 
+    # generate_heightmap takes the algorithm and seed directly and applies
+    # the erosion/cliff keys itself; everything else goes to the generator
+    algo = params.pop('algo', 'diamond-square')
+    params.pop('seed', None)
+
     for sd in seeds:
-        params['seed'] = sd
-        desc = f"{params['algo']}_s{sd}"
+        desc = f"{algo}_s{sd}"
         print(f"Generating {desc}...")
-        Z = generate_heightmap(**params)
+        Z = generate_heightmap(algo, seed=sd, **params)
         # Heightmap
         if args.save_heightmap:
             np.save(out_dir/f"{desc}_height.npy", Z)
@@ -83,11 +88,8 @@ if __name__ == '__main__':
             plt.imsave(out_dir/f"{desc}_biomes.png", img)
         # Spectrum
         if args.save_spectrum:
-            from scipy.fftpack import fftshift,fft2
-            F=fftshift(fft2(Z)); P=abs(F)**2
-            freqs=np.arange(P.shape[0]//2)
-            ps = [P.flatten()[...,]] # dummy
-        # Always save rendered height.png
-        plt.figure(); plt.imshow(Z,cmap=args.palette); plt.axis('off')
-        plt.tight_layout(pad=0); plt.savefig(out_dir/f"{desc}_terrain.png",dpi=200)
+            freqs, power = radial_power_spectrum(Z)
+            np.save(out_dir/f"{desc}_spectrum.npy", np.vstack((freqs, power)))
+        # Always save rendered height.png, one pixel per cell
+        plt.imsave(out_dir/f"{desc}_terrain.png", Z, cmap=args.palette, vmin=0, vmax=1)
     print(f"All outputs in {out_dir.resolve()}")
@@ -0,0 +1,105 @@
+# video.py
+
+import os
+import subprocess
+from contextlib import contextmanager
+from functools import lru_cache
+
+
+# H.264 encoders in order of preference: (name, pre-input args, output args).
+# yuv420p/nv12 need even dimensions, hence the pad filter.
+_PAD_EVEN = 'pad=ceil(iw/2)*2:ceil(ih/2)*2'
+_H264_HW_ENCODERS = (
+    ('h264_nvenc', [], ['-vf', _PAD_EVEN, '-c:v', 'h264_nvenc', '-pix_fmt', 'yuv420p']),
+    ('h264_qsv', [], ['-vf', _PAD_EVEN, '-c:v', 'h264_qsv', '-pix_fmt', 'nv12']),
+    ('h264_vaapi', ['-vaapi_device', '/dev/dri/renderD128'],
+     ['-vf', _PAD_EVEN + ',format=nv12,hwupload', '-c:v', 'h264_vaapi']),
+    ('h264_videotoolbox', [], ['-vf', _PAD_EVEN, '-c:v', 'h264_videotoolbox', '-pix_fmt', 'yuv420p']),
+)
+_H264_SOFTWARE = ([], ['-vf', _PAD_EVEN, '-c:v', 'libx264', '-preset', 'veryfast',
+                       '-tune', 'zerolatency', '-pix_fmt', 'yuv420p'])
+
+
+@lru_cache(maxsize=1)
+def _h264_encoder_args():
+    """
+    Pick the fastest working H.264 encoder once per process.
+    Hardware encoders listed by ``ffmpeg -encoders`` are only used after a
+    one-frame trial encode succeeds (a listed encoder may lack a device);
+    otherwise libx264 veryfast/zerolatency is used.
+    """
+    try:
+        listed = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'],
+                                capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return _H264_SOFTWARE
+    for name, pre, post in _H264_HW_ENCODERS:
+        if f' {name} ' not in listed:
+            continue
+        trial = ['ffmpeg', '-hide_banner', '-loglevel', 'error', *pre,
+                 '-f', 'lavfi', '-i', 'color=c=black:s=64x64', '-frames:v', '1',
+                 *post, '-f', 'null', '-']
+        try:
+            if subprocess.run(trial, capture_output=True, timeout=10).returncode == 0:
+                return pre, post
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+    return _H264_SOFTWARE
+
+
+def ffmpeg_rgb_pipe(output_path, width, height, fps):
+    """
+    Start an ffmpeg process that encodes raw RGB24 frames read from stdin.
+    MP4/MKV/MOV outputs use H.264 (hardware if available, see
+    :func:`_h264_encoder_args`); other extensions let ffmpeg pick the encoder.
+    """
+    pre, post = [], []
+    if os.path.splitext(output_path)[1].lower() in ('.mp4', '.mkv', '.mov'):
+        pre, post = _h264_encoder_args()
+    cmd = [
+        'ffmpeg', '-y', '-loglevel', 'error', *pre,
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+        '-s', f'{width}x{height}', '-r', str(fps),
+        '-i', '-', *post, output_path,
+    ]
+    return subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def finish_ffmpeg(proc, timeout=5):
+    """
+    Close ffmpeg's stdin and reap the process (killed if it has not exited
+    within ``timeout`` seconds); return its stderr. A pipe that is already
+    broken because ffmpeg quit early is not an error here.
+    """
+    try:
+        proc.stdin.close()
+    except BrokenPipeError:
+        pass
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+    return proc.stderr.read()
+
+
+@contextmanager
+def ffmpeg_rgb_writer(output_path, width, height, fps):
+    """
+    Run :func:`ffmpeg_rgb_pipe` for the block and yield its stdin, to which
+    the block writes raw RGB24 frames. On exit ffmpeg is finished and
+    reaped; if it failed (including quitting early, which breaks the pipe
+    mid-write) RuntimeError is raised with its stderr. Other errors from
+    the block propagate unchanged.
+    """
+    proc = ffmpeg_rgb_pipe(output_path, width, height, fps)
+    try:
+        yield proc.stdin
+    except BrokenPipeError:
+        pass   # ffmpeg exited early; its status and stderr are reported below
+    except BaseException:
+        finish_ffmpeg(proc)
+        raise
+    err = finish_ffmpeg(proc)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed ({proc.returncode}): {err.decode(errors='replace')}")